@@ -0,0 +1,131 @@
+import numpy as np
+
+
+class accumulator():
+
+    """
+    Base class for statistics of the matching matrix that are updated
+    incrementally during the merges, alongside T, P and Q.
+
+    ``start`` is called with the initial matching matrix, then after
+    each merge ``update`` is called with the changes made by the merge,
+    recorded by ``matching_matrix_events``, and ``value`` gives the
+    statistic at that level. The values are collected by
+    ``similarity_metrics`` under ``name``.
+
+    Subclasses only need to implement the methods for the changes that
+    affect their statistic.
+    """
+
+    name = None
+
+    def start(self, m):
+
+        """
+        Initialises the statistic from the initial matching matrix ``m``,
+        a diagonal matrix of the multiplicities of the objects.
+        """
+
+        pass
+
+    def update(self, cells, row_totals, column_totals):
+
+        """
+        Updates the statistic after a merge.
+
+        Parameters
+        ----------
+        cells : list of tuple
+            ``(value_1, value_2, row, column)`` for each pair of elements
+            of the matching matrix combined by the merge.
+        row_totals : tuple
+            The totals of the two rows merged.
+        column_totals : tuple
+            The totals of the two columns merged.
+        """
+
+        pass
+
+    def value(self):
+
+        """
+        The statistic after the latest merge.
+        """
+
+        raise NotImplementedError
+
+
+class sum_of_squares(accumulator):
+
+    """
+    The sums of the squares of the elements, row totals and column
+    totals of the matching matrix, stored as 'cells', 'rows' and
+    'columns'.
+    """
+
+    name = 'sum_of_squares'
+
+    def start(self, m):
+        self.cells = self.rows = self.columns = sum(w ** 2 for w in m.rtot.values())
+
+    def update(self, cells, row_totals, column_totals):
+        self.cells += 2 * sum(value_1 * value_2 for value_1, value_2, _, _ in cells)
+        self.rows += 2 * row_totals[0] * row_totals[1]
+        self.columns += 2 * column_totals[0] * column_totals[1]
+
+    def value(self):
+        return self.cells
+
+
+class max_overlap(accumulator):
+
+    """
+    The largest element of the matching matrix, i.e. the largest number
+    of objects shared by a cluster of A and a cluster of B.
+    """
+
+    name = 'max_overlap'
+
+    def start(self, m):
+        self.maximum = max(m.rtot.values())
+
+    def update(self, cells, row_totals, column_totals):
+        for value_1, value_2, _, _ in cells:
+            if value_1 + value_2 > self.maximum:
+                self.maximum = value_1 + value_2
+
+    def value(self):
+        return self.maximum
+
+
+class mutual_information(accumulator):
+
+    """
+    The mutual information (in nats) of the clusterings of A and B, from
+    the sums of :math:`x \\log x` over the elements, row totals and
+    column totals of the matching matrix,
+
+    .. math::
+       I = \\frac{1}{W} \\left( \\sum_{ij} n_{ij} \\log n_{ij}
+           - \\sum_i a_i \\log a_i - \\sum_j b_j \\log b_j \\right) + \\log W
+    """
+
+    name = 'mutual_information'
+
+    @staticmethod
+    def xlogx(x):
+        return x * np.log(x) if x > 0 else 0.0
+
+    def start(self, m):
+        self.W = sum(m.rtot.values())
+        self.cells = self.rows = self.columns = sum(self.xlogx(w) for w in m.rtot.values())
+
+    def update(self, cells, row_totals, column_totals):
+        f = self.xlogx
+        for value_1, value_2, _, _ in cells:
+            self.cells += f(value_1 + value_2) - f(value_1) - f(value_2)
+        self.rows += f(sum(row_totals)) - f(row_totals[0]) - f(row_totals[1])
+        self.columns += f(sum(column_totals)) - f(column_totals[0]) - f(column_totals[1])
+
+    def value(self):
+        return (self.cells - self.rows - self.columns) / self.W + np.log(self.W)
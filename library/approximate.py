@@ -0,0 +1,160 @@
+import math
+import numpy as np
+
+from library.linkages import leaf_order, pairs_from_sizes
+
+
+def sample_size_for_tolerance(tolerance, confidence=0.95):
+
+    """
+    Calculates the number of sampled pairs required for the estimate of
+    :math:`T_k / N` to be within ``tolerance`` of its true value with
+    probability ``confidence`` (by Hoeffding's inequality), where
+    :math:`N = n(n-1)/2` is the total number of pairs.
+    """
+
+    return int(math.ceil(math.log(2 / (1 - confidence)) / (2 * tolerance ** 2)))
+
+
+def tolerance_for_sample_size(sample_size, confidence=0.95):
+
+    """
+    Calculates the half-width, as a fraction of the total number of
+    pairs, of the confidence interval of the estimate of :math:`T_k`
+    from ``sample_size`` sampled pairs (by Hoeffding's inequality).
+    """
+
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * sample_size))
+
+
+def pair_merge_steps(Z, x, y, start=None):
+
+    """
+    Finds the merge at which each pair of objects ``(x[q], y[q])`` is
+    first placed into the same cluster.
+
+    The objects are placed in the order of ``leaf_order``, in which
+    every cluster is a range of consecutive objects. Each merge joins
+    two adjacent ranges, so it is the merge of the two objects on either
+    side of the boundary between them. A pair is merged with the last
+    of the boundaries between its two objects, i.e. the largest row
+    merging two consecutive objects between them. The maxima are taken
+    over the ranges delimited by the sampled objects and then over the
+    :math:`O(m)` of these ranges spanned by each pair with a sparse
+    table, so the cost is :math:`O(n)` vectorised plus
+    :math:`O(m \\log m)` for :math:`m` pairs.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    x, y : ndarray
+        The objects in each pair. The two objects in a pair must differ.
+    start : ndarray, optional
+        The positions of the nodes given by ``leaf_order``, which are
+        calculated if not given.
+
+    Returns
+    -------
+    steps : ndarray
+        A vector where the ``q``'th element is the index of the row of
+        ``Z`` in which ``x[q]`` and ``y[q]`` were merged.
+    """
+
+    n = len(Z) + 1
+    if start is None:
+        start, _ = leaf_order(Z)
+
+    # The row merging the objects at positions p and p + 1 is stored at p
+    boundary = np.empty(n, dtype=np.int64)
+    boundary[start[Z[:, 1].astype(np.intp)] - 1] = np.arange(n - 1)
+    boundary[n - 1] = -1
+
+    first = np.minimum(start[x], start[y])
+    last = np.maximum(start[x], start[y])
+
+    # Maxima between consecutive sampled positions
+    cuts = np.unique(np.concatenate([first, last]))
+    ranges = [np.maximum.reduceat(boundary, cuts)[:-1]]
+    first = np.searchsorted(cuts, first)
+    last = np.searchsorted(cuts, last)
+
+    # Maxima over 2^j consecutive ranges
+    while 2 ** len(ranges) <= len(ranges[0]):
+        half = 2 ** (len(ranges) - 1)
+        ranges.append(np.maximum(ranges[-1][:-half], ranges[-1][half:]))
+
+    j = np.log2(last - first).astype(np.intp)
+    steps = np.empty(len(x), dtype=np.int64)
+    for level in np.unique(j).tolist():
+        q = j == level
+        table = ranges[level]
+        steps[q] = np.maximum(table[first[q]], table[last[q] - 2 ** level])
+
+    return steps
+
+
+def approximate_TPQ(A, B, sample_size=None, tolerance=None, confidence=0.95, seed=None):
+
+    """
+    Estimates :math:`T` from a random sample of pairs of objects and
+    calculates :math:`P` and :math:`Q` exactly from the cluster sizes.
+
+    The pairs are sampled uniformly with replacement. For each level the
+    proportion of sampled pairs placed into the same cluster in both
+    hierarchical clusterings estimates :math:`T_k / N`. By Hoeffding's
+    inequality each estimate is within ``T_error`` of :math:`T_k` with
+    probability at least ``confidence``.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    sample_size : int, optional
+        The number of pairs to sample.
+    tolerance : float, optional
+        The required half-width of the confidence interval as a fraction
+        of the total number of pairs. Used to choose the sample size if
+        ``sample_size`` is not given. Defaults to 0.01.
+    confidence : float
+        The probability that each estimate is within ``T_error`` of its
+        true value.
+    seed : int, optional
+        Seed of the random number generator used to sample the pairs.
+
+    Returns
+    -------
+    T, P, Q : ndarray
+        Vectors of size :math:`n-2`, see ``similarity_metrics.TPQ_linkages``.
+        ``T`` is estimated, ``P`` and ``Q`` are exact.
+    T_error : float
+        The half-width of the confidence interval of each element of ``T``.
+    """
+
+    n = len(A) + 1
+    N = n * (n - 1) // 2
+
+    if sample_size is None:
+        sample_size = sample_size_for_tolerance(0.01 if tolerance is None else tolerance, confidence)
+
+    rng = np.random.default_rng(seed)
+    x = rng.integers(0, n, sample_size)
+    y = rng.integers(0, n - 1, sample_size)
+    y += y >= x
+
+    steps, pairs = [], []
+    for Z in [A, B]:
+        start, sizes = leaf_order(Z)
+        steps.append(pair_merge_steps(Z, x, y, start))
+        pairs.append(pairs_from_sizes(sizes[Z[:, 0].astype(np.intp)], sizes[Z[:, 1].astype(np.intp)])[:n - 2])
+
+    together = np.cumsum(np.bincount(np.maximum(*steps), minlength=n - 1))[:n - 2]
+    P, Q = pairs
+    T = np.minimum(N * together / sample_size, np.minimum(P, Q))
+
+    return T, P, Q, N * tolerance_for_sample_size(sample_size, confidence)
@@ -0,0 +1,130 @@
+import numpy as np
+
+from library.linkages import check_linkage
+from library.matching_matrices.matching_matrix import matching_matrix
+from library.similarity import similarity_metrics
+
+
+def merge_keys(Z):
+
+    """
+    Encodes the merges of a hierarchical clustering as an :math:`(n-1)`
+    by 2 integer array, with the smaller label of each merge first, so
+    that hierarchies with the same merges have the same rows regardless
+    of the heights or the order of the labels within a row.
+    """
+
+    merges = Z[:, :2].astype(np.int64)
+    return np.sort(merges, axis=1)
+
+
+def common_prefix(x, y):
+
+    """
+    Calculates the number of leading rows shared by two arrays of merges.
+    """
+
+    different = np.flatnonzero(np.any(x != y, axis=1))
+    return len(x) if len(different) == 0 else different[0]
+
+
+def compare_many(A, Bs, validate='numpy', weights=None):
+
+    """
+    Compares one hierarchical clustering against several others,
+    merging the matching matrix only once for any leading merges that
+    the others share.
+
+    The hierarchies in ``Bs`` are sorted by their merges, so those with a
+    common prefix of merges are adjacent. The ``i``'th hierarchy in this
+    order starts from the state after the merges it shares with the
+    ``(i-1)``'th, and this state is copied from the matching matrix of
+    the last earlier hierarchy that started no later, while it is
+    merged. Each merge shared by several hierarchies is therefore only
+    made once, at the cost of copying the matching matrix at the points
+    where the hierarchies diverge.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    Bs : sequence of ndarray
+        The linkages (or arrays of merges) compared with A.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+
+    Returns
+    -------
+    metrics : list of similarity_metrics
+        The metrics comparing A with each of the hierarchies in ``Bs``,
+        in the same order as ``Bs``.
+    """
+
+    A = check_linkage(A, validate)
+    n = len(A) + 1
+    Bs = [check_linkage(B, validate) for B in Bs]
+
+    for B in Bs:
+        if len(B) != n - 1:
+            raise ValueError("The hierarchical clusterings must be of the same set of objects")
+
+    W = n if weights is None else sum(int(w) for w in weights)
+    N = W * (W - 1) // 2
+
+    keys = [merge_keys(B) for B in Bs]
+    order = sorted(range(len(Bs)), key=lambda i: keys[i].tobytes())
+
+    # The number of merges each hierarchy shares with the previous one
+    start = [0] + [common_prefix(keys[i], keys[j]) for i, j in zip(order[:-1], order[1:])]
+    start = [min(s, n - 2) for s in start]
+
+    # Each hierarchy's starting state is copied from the last earlier one that starts no later
+    source = [None] * len(order)
+    forks = [{} for r in order]
+    stack = []
+    for r, s in enumerate(start):
+        while stack and start[stack[-1]] > s:
+            stack.pop()
+        if stack:
+            source[r] = stack[-1]
+            forks[stack[-1]].setdefault(s, []).append(r)
+        stack.append(r)
+
+    states = {}
+    TPQ = [None] * len(order)
+
+    for r, i in enumerate(order):
+
+        B = Bs[i]
+        T, P, Q = np.zeros(n - 2), np.zeros(n - 2), np.zeros(n - 2)
+
+        if source[r] is None:
+            state = matching_matrix(n, weights)
+        else:
+            state = states.pop(r)
+            for x, x_0 in zip((T, P, Q), TPQ[source[r]]):
+                x[:start[r]] = x_0[:start[r]]
+
+        # The state may also be the starting point of other hierarchies
+        shared = forks[r].pop(start[r], [])
+        for t in shared:
+            states[t] = state
+        m = state.copy() if source[r] is not None or shared else state
+
+        for k in range(start[r], n - 2):
+            T[k], P[k], Q[k] = m.merge(A[k, 0], A[k, 1], B[k, 0], B[k, 1], k)
+            if k + 1 in forks[r]:
+                snapshot = m.copy()
+                for t in forks[r].pop(k + 1):
+                    states[t] = snapshot
+
+        TPQ[r] = (T, P, Q)
+
+    metrics = [None] * len(order)
+    for r, i in enumerate(order):
+        metrics[i] = similarity_metrics.from_TPQ(*TPQ[r], n, N)
+
+    return metrics
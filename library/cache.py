@@ -0,0 +1,133 @@
+import os
+import numpy as np
+
+from library.hashing import pair_key
+
+
+class TPQ_cache():
+
+    """
+    Content addressed on-disk cache of :math:`T`, :math:`P` and
+    :math:`Q`.
+
+    Entries are keyed by a hash of the merges in the two linkages. The
+    key is shared by ``(A, B)`` and ``(B, A)`` since swapping the
+    hierarchies only swaps :math:`P` and :math:`Q`, so a repeated
+    comparison costs a hash and a read.
+
+    Entries are stored either as compressed ``.npz`` files or as
+    uncompressed ``.npy`` files which are memory-mapped when read. When
+    the total size of the entries exceeds ``max_bytes`` the least
+    recently used entries are removed.
+
+    Parameters
+    ----------
+    directory : str
+        The directory used to store the entries. It is created if it
+        does not exist.
+    max_bytes : int, optional
+        The maximum total size of the entries in bytes. The size is
+        unbounded if this is not given.
+    compressed : bool
+        Whether to store the entries as compressed ``.npz`` files rather
+        than memory-mappable ``.npy`` files.
+    """
+
+    def __init__(self, directory, max_bytes=None, compressed=True):
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compressed = compressed
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+
+        extension = '.npz' if self.compressed else '.npy'
+        return os.path.join(self.directory, key + extension)
+
+    def get(self, A, B):
+
+        """
+        Retrieves :math:`T`, :math:`P` and :math:`Q` for the linkages
+        A and B.
+
+        Returns
+        -------
+        TPQn : tuple or None
+            The tuple ``(T, P, Q, n)`` if the pair is in the cache and
+            None otherwise.
+        """
+
+        key, swapped = pair_key(A, B)
+        path = self.path(key)
+
+        try:
+            if self.compressed:
+                with np.load(path) as entry:
+                    T, P, Q = entry['T'], entry['P'], entry['Q']
+            else:
+                T, P, Q = np.load(path, mmap_mode='r')
+
+        except FileNotFoundError:
+            return None
+
+        # Record the use of the entry for the eviction policy
+        os.utime(path)
+
+        if swapped:
+            P, Q = Q, P
+
+        return T, P, Q, len(T) + 2
+
+    def put(self, A, B, T, P, Q):
+
+        """
+        Stores :math:`T`, :math:`P` and :math:`Q` for the linkages A
+        and B and evicts the least recently used entries if the cache
+        is larger than ``max_bytes``.
+        """
+
+        key, swapped = pair_key(A, B)
+
+        if swapped:
+            P, Q = Q, P
+
+        path = self.path(key)
+        temporary = os.path.join(self.directory, '.%s.%d.tmp' % (key, os.getpid()))
+
+        # Write to a temporary file first so readers never see a partial entry
+        with open(temporary, 'wb') as f:
+            if self.compressed:
+                np.savez_compressed(f, T=T, P=P, Q=Q)
+            else:
+                np.save(f, np.array([T, P, Q]))
+
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+
+        """
+        Removes the least recently used entries until the total size
+        of the cache is at most ``max_bytes``.
+        """
+
+        if self.max_bytes is None:
+            return
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.npz', '.npy')):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
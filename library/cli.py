@@ -0,0 +1,273 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+
+import numpy as np
+
+from library.cache import TPQ_cache
+from library.indices import index_function
+from library.similarity import similarity_metrics
+
+
+def find_linkages(directory=None, manifest=None):
+
+    """
+    Finds the linkages to compare, either all of the ``.npy`` files in
+    a directory or the paths listed one per line in a manifest.
+
+    Returns
+    -------
+    linkages : dict
+        A map from the name of each linkage (the file name without its
+        extension) to its path.
+    """
+
+    if manifest is not None:
+        base = os.path.dirname(manifest)
+        with open(manifest) as f:
+            paths = [os.path.join(base, line.strip()) for line in f if line.strip()]
+    else:
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.endswith('.npy'))
+
+    linkages = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in linkages:
+            raise ValueError("Linkage name '%s' is not unique" % name)
+        linkages[name] = path
+
+    return linkages
+
+
+def plan_comparisons(names, plan, reference=None, pairs=None):
+
+    """
+    Lists the pairs of linkages to compare.
+
+    Parameters
+    ----------
+    names : list
+        The names of the linkages.
+    plan : str
+        Either 'all-pairs' to compare every pair of linkages,
+        'one-vs-many' to compare ``reference`` to every other linkage
+        or 'pairs' to compare the pairs listed in the file ``pairs``,
+        one whitespace separated pair per line.
+
+    Returns
+    -------
+    comparisons : list
+        A list of pairs of names.
+    """
+
+    if plan == 'all-pairs':
+        return list(itertools.combinations(names, 2))
+
+    if plan == 'one-vs-many':
+        if reference not in names:
+            raise ValueError("The reference linkage '%s' was not found" % reference)
+        return [(reference, name) for name in names if name != reference]
+
+    if plan == 'pairs':
+        comparisons = []
+        with open(pairs) as f:
+            for line in f:
+                if line.strip():
+                    a, b = line.split()
+                    if a not in names or b not in names:
+                        raise ValueError("Unknown linkage in pair '%s'" % line.strip())
+                    comparisons.append((a, b))
+        return comparisons
+
+    raise ValueError("Unknown comparison plan '%s'" % plan)
+
+
+def compare_files(path_A, path_B, indices, cache_directory=None):
+
+    """
+    Worker which loads and compares two linkages.
+
+    Returns
+    -------
+    output : dict
+        A map from each index to its values.
+    n : int
+        The number of objects in the hierarchical clusterings.
+    """
+
+    cache = None
+    if cache_directory is not None:
+        cache = TPQ_cache(cache_directory)
+
+    metrics = similarity_metrics(np.load(path_A), np.load(path_B), cache=cache)
+    return metrics.get_index(indices), metrics.n
+
+
+class csv_writer():
+
+    """
+    Writes results as rows of ``a, b, level, clusters`` followed by the
+    value of each index.
+    """
+
+    def __init__(self, path, indices):
+
+        self.indices = list(indices)
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['a', 'b', 'level', 'clusters'] + self.indices)
+
+    def write(self, a, b, output, n):
+
+        values = [output[index] for index in self.indices]
+        for level, row in enumerate(zip(*values)):
+            self.writer.writerow([a, b, level, n - level - 1] + [repr(float(x)) for x in row])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class npz_writer():
+
+    """
+    Writes results to a ``.npz`` archive with one array named
+    ``a/b/index`` per comparison and index. Arrays are added to the
+    archive as soon as they are available.
+    """
+
+    def __init__(self, path, indices):
+
+        self.indices = list(indices)
+        self.archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, a, b, output, n):
+
+        for index in self.indices:
+            with self.archive.open('%s/%s/%s.npy' % (a, b, index), 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asarray(output[index]))
+
+    def close(self):
+        self.archive.close()
+
+
+def normalise_indices(indices):
+
+    """
+    Converts the names of the indices to lower case and removes any
+    which repeat an earlier index, including under another name, so the
+    same names are used for the output and to calculate the values.
+    Raises a ValueError for unknown indices.
+    """
+
+    names, functions = [], []
+    for index in indices:
+        f = index_function(index)
+        if f not in functions:
+            names.append(index.lower())
+            functions.append(f)
+
+    return names
+
+
+def run(linkages, comparisons, indices, writer, workers=None, max_pending=None,
+        cache_directory=None, progress=sys.stderr):
+
+    """
+    Performs the comparisons in parallel and writes the results as
+    each comparison finishes.
+
+    At most ``max_pending`` comparisons are queued at any time so
+    memory use is bounded regardless of the number of comparisons.
+
+    Returns
+    -------
+    completed : int
+        The number of comparisons performed.
+    """
+
+    if max_pending is None:
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+
+    total = len(comparisons)
+    completed = merges = 0
+    start = perf_counter()
+    pending = {}
+    comparisons = iter(comparisons)
+
+    with ProcessPoolExecutor(workers) as executor:
+
+        while True:
+
+            for a, b in itertools.islice(comparisons, max_pending - len(pending)):
+                future = executor.submit(compare_files, linkages[a], linkages[b], indices, cache_directory)
+                pending[future] = (a, b)
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                a, b = pending.pop(future)
+                output, n = future.result()
+                writer.write(a, b, output, n)
+
+                completed += 1
+                merges += n - 1
+                if progress is not None:
+                    elapsed = perf_counter() - start
+                    progress.write('[%d/%d] %s vs %s  %.2f comparisons/s  %.0f merges/s\n' % (
+                        completed, total, a, b, completed / elapsed, merges / elapsed))
+                    progress.flush()
+
+    return completed
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Compare a collection of hierarchical clusterings stored as .npy linkage files.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--directory', help='Directory containing the .npy linkage files')
+    source.add_argument('--manifest', help='File listing the paths of the linkage files, one per line')
+    parser.add_argument('--plan', choices=['all-pairs', 'one-vs-many', 'pairs'], default='all-pairs')
+    parser.add_argument('--reference', help="Name of the linkage compared to every other for the 'one-vs-many' plan")
+    parser.add_argument('--pairs', help="File listing the pairs of names to compare for the 'pairs' plan")
+    parser.add_argument('--index', nargs='+', default=['ar'], help='Indices to calculate')
+    parser.add_argument('--output', required=True, help='Output file, either .csv or .npz')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--max-pending', type=int, default=None, help='Maximum number of queued comparisons')
+    parser.add_argument('--cache', help='Directory of an on-disk cache of T, P and Q')
+    parser.add_argument('--quiet', action='store_true', help='Do not report progress')
+    args = parser.parse_args(argv)
+
+    try:
+        indices = normalise_indices(args.index)
+    except ValueError as error:
+        parser.error(str(error))
+
+    linkages = find_linkages(args.directory, args.manifest)
+    comparisons = plan_comparisons(list(linkages), args.plan, args.reference, args.pairs)
+
+    if args.output.endswith('.npz'):
+        writer = npz_writer(args.output, indices)
+    elif args.output.endswith('.csv'):
+        writer = csv_writer(args.output, indices)
+    else:
+        parser.error('The output must be a .csv or .npz file')
+
+    try:
+        run(linkages, comparisons, indices, writer, args.workers, args.max_pending,
+            args.cache, None if args.quiet else sys.stderr)
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import itertools
+import multiprocessing
+import os
+import threading
+import numpy as np
+
+from library.engine import prepare_hierarchy, sweep_chunks
+from library.indices import index_function
+from library.linkages import check_linkage
+
+
+def advance_pairs(prepared, pairs, index, check_every, report, abandon):
+
+    """
+    Merges pairs of hierarchical clusterings in turns of ``check_every``
+    merges, reporting the index summed over the levels merged so far
+    after each turn.
+
+    The matching matrices stay within this function, so it can run in
+    a worker process for all its pairs while only the reports are sent
+    back.
+
+    Parameters
+    ----------
+    prepared : dict
+        The output of ``prepare_hierarchy`` for the hierarchies in the
+        pairs, by position.
+    pairs : list of tuple
+        The positions of the hierarchies to merge.
+    index : str
+        The index used to compare the hierarchies.
+    check_every : int
+        The number of merges in each turn.
+    report : callable
+        Called with ``(pair, merges, total, T)`` after each turn, where
+        ``total`` is the index summed over the ``merges`` levels done
+        and ``T`` is the latest :math:`T`, and with ``(pair, None, None,
+        None)`` once the pair is finished or abandoned.
+    abandon : dict
+        An event for each pair, set when the pair is no longer needed.
+    """
+
+    n = len(next(iter(prepared.values()))[0]) + 1
+    N = n * (n - 1) // 2
+    f = index_function(index)
+
+    sweeps = {(i, j): sweep_chunks(prepared[i], prepared[j], check_every) for i, j in pairs}
+    progress = {pair: (0, 0.0) for pair in pairs}
+
+    try:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            while sweeps:
+                for (i, j), sweep in list(sweeps.items()):
+                    T = None if abandon[i, j].is_set() else next(sweep, None)
+                    if T is None:
+                        del sweeps[i, j]
+                        report((i, j), None, None, None)
+                        continue
+                    merges, total = progress[i, j]
+                    stop = merges + len(T)
+                    total += np.sum(f(T, prepared[i][2][merges:stop], prepared[j][2][merges:stop], N))
+                    progress[i, j] = (stop, total)
+                    report((i, j), stop, total, T[-1])
+    finally:
+        for pair in sweeps:
+            report(pair, None, None, None)
+
+
+def medoid(linkages, index='ar', check_every=None, executor=None, workers=None, validate='numpy'):
+
+    """
+    Finds the hierarchical clustering with the largest mean similarity
+    to the others, where the similarity of two hierarchical clusterings
+    is the mean of the index over the levels.
+
+    The :math:`K(K-1)/2` pairs of hierarchies are merged in turns of
+    ``check_every`` rows. As in ``best_levels``, :math:`P` and
+    :math:`Q` are known in advance and :math:`T` is non-decreasing and
+    at most :math:`\\min(P, Q)`, so after each turn the index at the
+    remaining levels of the pair is bounded below using the current
+    :math:`T` and above using :math:`\\min(P, Q)`. A candidate is
+    abandoned once its upper bound is below the lower bound of another
+    candidate, and the pairs of abandoned candidates are no longer
+    merged.
+
+    Parameters
+    ----------
+    linkages : sequence of ndarray
+        The :math:`K` candidate linkages (or arrays of merges) of the
+        same :math:`n` objects.
+    index : str
+        The index used to compare the hierarchies, see
+        ``similarity_metrics.get_index``.
+    check_every : int, optional
+        The number of merges between evaluations of the bounds.
+        Defaults to :math:`n/16`.
+    executor : concurrent.futures.Executor, optional
+        An executor, for example a ``ProcessPoolExecutor``, used to
+        merge the pairs in parallel. The pairs are split into
+        ``workers`` groups, each merged by a single task, see
+        ``advance_pairs``, which is sent the hierarchies resolved by
+        ``prepare_hierarchy`` once and reports back after each turn.
+        The pairs are merged in this process if it is not given.
+    workers : int, optional
+        The number of tasks given to the executor, which should be its
+        number of workers. Defaults to the number of processors.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    best : int
+        The position in ``linkages`` of the medoid.
+    scores : ndarray
+        The mean similarity of each candidate to the others, or NaN for
+        the candidates that were abandoned.
+    """
+
+    linkages = [check_linkage(Z, validate) for Z in linkages]
+    K = len(linkages)
+    n = len(linkages[0]) + 1
+    N = n * (n - 1) // 2
+    f = index_function(index)
+
+    if K < 2:
+        raise ValueError("At least two hierarchical clusterings are required")
+
+    for Z in linkages:
+        if len(Z) != n - 1:
+            raise ValueError("The hierarchical clusterings must be of the same set of objects")
+
+    if check_every is None:
+        check_every = max(1, n // 16)
+
+    prepared = [prepare_hierarchy(Z) for Z in linkages]
+    P = [p[2][:n - 2] for p in prepared]
+    pairs = list(itertools.combinations(range(K), 2))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # The index at each level bounded using min(P, Q), summed from each level on
+        upper = {}
+        for i, j in pairs:
+            high = np.nan_to_num(f(np.minimum(P[i], P[j]), P[i], P[j], N))
+            upper[i, j] = np.concatenate([np.cumsum(high[::-1])[::-1], [0]])
+
+        def lower(i, j, merges, T):
+            return np.sum(np.nan_to_num(f(T, P[i][merges:], P[j][merges:], N)))
+
+        # For each pair: the index summed over the merges done and the bounds of the total
+        states = {(i, j): [0.0, lower(i, j, 0, 0), upper[i, j][0]] for i, j in pairs}
+        candidates = set(range(K))
+        abandon = {}
+
+        def receive(pair, merges, total, T):
+
+            if merges is None:
+                return
+
+            states[pair] = [total, total + lower(*pair, merges, T), total + upper[pair][merges]]
+
+            # Bounds on the total index of each candidate over all the others
+            low, high = np.zeros(K), np.zeros(K)
+            for (i, j), (_, l, h) in states.items():
+                low[[i, j]] += l
+                high[[i, j]] += h
+
+            best = max(low[i] for i in candidates)
+            candidates.intersection_update([i for i in range(K) if high[i] >= best])
+
+            for i, j in [(i, j) for i, j in abandon if i not in candidates and j not in candidates]:
+                abandon.pop((i, j)).set()
+
+        if executor is None:
+            abandon.update({pair: threading.Event() for pair in pairs})
+            advance_pairs(dict(enumerate(prepared)), pairs, index, check_every, receive, dict(abandon))
+
+        else:
+            workers = workers or os.cpu_count() or 1
+            groups = [pairs[g::workers] for g in range(min(workers, len(pairs)))]
+
+            with multiprocessing.Manager() as manager:
+                reports = manager.Queue()
+                abandon.update({pair: manager.Event() for pair in pairs})
+
+                futures = []
+                for group in groups:
+                    hierarchies = {i: prepared[i] for i in set(itertools.chain(*group))}
+                    futures.append(executor.submit(advance_pairs, hierarchies, group, index, check_every,
+                                                   reports.put, {pair: abandon[pair] for pair in group}))
+
+                running = len(pairs)
+                while running:
+                    pair, merges, total, T = reports.get()
+                    if merges is None:
+                        running -= 1
+                    receive(pair, merges, total, T)
+
+                for future in futures:
+                    future.result()
+
+    scores = np.full(K, np.nan)
+    for i in candidates:
+        scores[i] = sum(states[pair][0] for pair in pairs if i in pair) / ((K - 1) * (n - 2))
+
+    return int(np.nanargmax(scores)), scores
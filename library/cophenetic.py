@@ -0,0 +1,436 @@
+import numpy as np
+
+from library.linkages import check_linkages, leaf_order, merge_sizes
+
+
+def cross_costs(A, B):
+
+    """
+    Estimates the relative cost of ``cross_products`` and
+    ``cross_products_paths`` for A and B, in this order.
+
+    In both, each object is moved once per merge of A in which it is in
+    the smaller cluster. ``cross_products`` then handles every ancestor
+    of the object in B, i.e. the total depth of the leaves of B, which
+    is the total size of the clusters formed by its merges.
+    ``cross_products_paths`` handles every heavy path crossed by the
+    object, which is one more than the number of its ancestors formed
+    from the smaller cluster of a merge, with :math:`O(\\log n)` steps
+    for each.
+    """
+
+    n = len(A) + 1
+    moves = n + np.sum(np.minimum(*merge_sizes(A)))
+
+    sizes_1, sizes_2 = merge_sizes(B)
+    depth = np.sum(sizes_1 + sizes_2)
+    light = np.minimum(sizes_1, sizes_2)
+    paths = n + np.sum(light[light > 1])
+
+    return moves * depth / n, 4 * moves * paths / n * np.log2(n)
+
+
+def cross_products(A, B, heights_A, heights_B):
+
+    """
+    Calculates the sum over all pairs of objects of the product of the
+    heights at which the pair is merged in A and in B.
+
+    The clusters of A are merged as in ``matching_matrix``, merging the
+    smaller cluster into the larger. Each cluster of A stores, for every
+    node of B that is an ancestor of one of its objects, the number of
+    its objects below that node. When clusters :math:`X` and :math:`Y`
+    of A merge, the pairs :math:`x \\in X`, :math:`y \\in Y` whose lowest
+    common ancestor in B is the node :math:`b` number
+    :math:`|X_b||Y_b| - \\sum_c |X_c||Y_c|` over the children :math:`c`
+    of :math:`b`. Summing over the nodes telescopes to
+
+    .. math::
+       \\sum_{x \\in X, y \\in Y} c_B(x, y) = \\sum_b |X_b||Y_b| (h_b - h_{parent(b)})
+
+    which only requires the nodes stored for the smaller cluster. The
+    cost is proportional to the total depth of the leaves of B
+    multiplied by :math:`\\log n`, i.e. :math:`O(n \\log^2 n)` for a
+    balanced B but :math:`O(n^2)` when B is a chain, for which
+    ``cophenetic_sums`` uses ``cross_products_paths`` instead. The
+    memory needed is
+    bounded by the same total depth, which is :math:`O(n)` when the
+    clusters of A are also clusters of B.
+
+    Parameters
+    ----------
+    A, B : ndarray
+        The linkage matrices or arrays of merges.
+    heights_A, heights_B : ndarray
+        The height of each merge in A and B.
+
+    Returns
+    -------
+    total : float
+        The sum over all pairs of objects of :math:`c_A c_B`.
+    """
+
+    n = len(A) + 1
+
+    # Parent of each node of B and the difference of its height from its parent
+    parent = np.full(2 * n - 1, -1, dtype=np.int64)
+    parent[B[:, 0].astype(np.int64)] = np.arange(n, 2 * n - 1)
+    parent[B[:, 1].astype(np.int64)] = np.arange(n, 2 * n - 1)
+
+    height = np.concatenate([np.zeros(n), heights_B, [0]])
+    weight = (height[:2 * n - 1] - height[parent]).tolist()
+    parent = parent.tolist()
+
+    def ancestors(leaf):
+        counts = {}
+        b = parent[leaf]
+        while b != -1:
+            counts[b] = 1
+            b = parent[b]
+        return counts
+
+    counts = {}
+    total = 0.0
+
+    for k, (i, j) in enumerate(A[:, :2].astype(np.int64).tolist()):
+
+        X = counts.pop(i) if i >= n else ancestors(i)
+        Y = counts.pop(j) if j >= n else ancestors(j)
+
+        if len(X) > len(Y):
+            X, Y = Y, X
+
+        cross = 0.0
+        for b, count in X.items():
+            if b in Y:
+                cross += count * Y[b] * weight[b]
+                Y[b] += count
+            else:
+                Y[b] = count
+
+        total += heights_A[k] * cross
+        counts[n + k] = Y
+
+    return total
+
+
+def heavy_paths(Z, heights):
+
+    """
+    Splits the clusters formed by the merges of a hierarchical
+    clustering into heavy paths, following from each cluster the larger
+    of the two clusters merged to form it. The path from any leaf to the
+    root crosses :math:`O(\\log n)` heavy paths, and the clusters of
+    each heavy path are given consecutive positions starting from the
+    top.
+
+    Parameters
+    ----------
+    Z : ndarray
+        The linkage matrix or array of merges.
+    heights : ndarray
+        The height of each merge.
+
+    Returns
+    -------
+    segments : list
+        For each leaf, the ranges ``(first, last + 1)`` of positions of
+        the clusters it belongs to.
+    weights : ndarray
+        The difference between the height of the cluster at each
+        position and the height of the cluster it is merged into, zero
+        for the root.
+    """
+
+    n = len(Z) + 1
+    first, second = Z[:, 0].astype(np.intp), Z[:, 1].astype(np.intp)
+    sizes = np.concatenate([np.ones(n), np.add(*merge_sizes(Z))])
+
+    parent = np.full(2 * n - 1, -1, dtype=np.intp)
+    parent[first] = np.arange(n, 2 * n - 1)
+    parent[second] = np.arange(n, 2 * n - 1)
+    is_heavy = np.zeros(2 * n - 1, dtype=bool)
+    is_heavy[np.where(sizes[first] > sizes[second], first, second)] = True
+
+    # The top of the heavy path of each cluster and the distance to it, by pointer jumping
+    heavy = is_heavy[n:]
+    pointer = np.where(heavy, parent[n:] - n, np.arange(n - 1))
+    distance = heavy.astype(np.intp)
+    while True:
+        jumped = pointer[pointer]
+        if np.array_equal(jumped, pointer):
+            break
+        distance = distance + distance[pointer]
+        pointer = jumped
+
+    lengths = np.bincount(pointer, minlength=n - 1)
+    position = (np.cumsum(lengths) - lengths)[pointer] + distance
+
+    height = np.concatenate([heights, [0]])
+    weights = np.empty(n - 1)
+    weights[position] = height[:n - 1] - height[np.where(parent[n:] == -1, n - 1, parent[n:] - n)]
+
+    # The top of the path of each cluster and the cluster above the top, as clusters formed by merges
+    top = (pointer + n).tolist()
+    above = parent.tolist()
+    position = np.concatenate([np.zeros(n, dtype=np.intp), position]).tolist()
+
+    segments = []
+    for leaf in range(n):
+        leaf_segments = []
+        c = above[leaf]
+        while c != -1:
+            t = top[c - n]
+            leaf_segments.append((position[t], position[c] + 1))
+            c = above[t]
+        segments.append(leaf_segments)
+
+    return segments, weights
+
+
+def cross_products_paths(A, B, heights_A, heights_B):
+
+    """
+    Calculates the same sum as ``cross_products`` in a time that does
+    not depend on the depth of the hierarchies.
+
+    The clusters of A are visited by a depth-first search which
+    descends into the smaller cluster of each merge first and clears its
+    objects once the cluster is finished, and into the larger cluster
+    last and keeps its objects. The number of objects kept below each
+    node of B is stored along the heavy paths of B in two Fenwick trees,
+    which add to all the clusters of B containing an object and sum
+    :math:`|Y_b| (h_b - h_{parent(b)})` over them in :math:`O(\\log^2 n)`
+    each. When the larger cluster :math:`Y` of a merge is kept, every
+    object :math:`x` of the smaller cluster :math:`X` is queried and
+    then added, so each object is queried, added and removed once per
+    merge in which it is in the smaller cluster, at most
+    :math:`\\log_2 n` times, for a total of :math:`O(n \\log^3 n)`.
+
+    Parameters
+    ----------
+    A, B : ndarray
+        The linkage matrices or arrays of merges.
+    heights_A, heights_B : ndarray
+        The height of each merge in A and B.
+
+    Returns
+    -------
+    total : float
+        The sum over all pairs of objects of :math:`c_A c_B`.
+    """
+
+    n = len(A) + 1
+    segments, weights = heavy_paths(B, heights_B)
+
+    # Fenwick trees of the number of objects added from each position on,
+    # and of the same counts multiplied by the weights before the position
+    size = n - 1
+    counts = [0] * (size + 2)
+    weighted = [0.0] * (size + 2)
+    cumulative = np.concatenate([[0], np.cumsum(weights)]).tolist()
+
+    def add(i, delta):
+        w = delta * cumulative[i]
+        i += 1
+        while i <= size + 1:
+            counts[i] += delta
+            weighted[i] += w
+            i += i & -i
+
+    def prefix(i):
+        c, w, q = 0, 0.0, cumulative[i]
+        while i > 0:
+            c += counts[i]
+            w += weighted[i]
+            i -= i & -i
+        return q * c - w
+
+    def update(leaf, delta):
+        for first, stop in segments[leaf]:
+            add(first, delta)
+            add(stop, -delta)
+
+    def query(leaf):
+        return sum(prefix(stop) - prefix(first) for first, stop in segments[leaf])
+
+    # The objects of each cluster of A are consecutive in its leaf order
+    start, sizes = leaf_order(A)
+    leaves = np.argsort(start[:n]).tolist()
+    start, sizes = start.tolist(), sizes.tolist()
+
+    merges = A[:, :2].astype(np.int64).tolist()
+    heights_A = np.asarray(heights_A).tolist()
+    total = 0.0
+
+    stack = [(2 * n - 2, True, False)]
+    while stack:
+
+        c, keep, merged = stack.pop()
+
+        if c < n:
+            if keep:
+                update(c, 1)
+            continue
+
+        i, j = merges[c - n]
+        small, large = (j, i) if sizes[j] < sizes[i] else (i, j)
+
+        if not merged:
+            stack.append((c, keep, True))
+            stack.append((large, True, False))
+            stack.append((small, False, False))
+            continue
+
+        X = leaves[start[small]:start[small] + sizes[small]]
+        total += heights_A[c - n] * sum(query(x) for x in X)
+        for x in X:
+            update(x, 1)
+
+        if not keep:
+            for x in leaves[start[c]:start[c] + sizes[c]]:
+                update(x, -1)
+
+    return total
+
+
+def cophenetic_sums(A, B, heights_A=None, heights_B=None, validate='numpy'):
+
+    """
+    Calculates the sums needed to correlate the cophenetic distances of
+    two hierarchical clusterings without forming the :math:`n(n-1)/2`
+    distances.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    heights_A, heights_B : ndarray, optional
+        The value given to the pairs merged in each row of A and B.
+        Defaults to the heights in the third column.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    sums : dict
+        The number of pairs ``N`` and the sums over all pairs of
+        :math:`c_A` ('A'), :math:`c_B` ('B'), :math:`c_A^2` ('AA'),
+        :math:`c_B^2` ('BB') and :math:`c_A c_B` ('AB').
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    if heights_A is None or heights_B is None:
+        if A.shape[1] != 4 or B.shape[1] != 4:
+            raise ValueError("The heights of the merges are required for the cophenetic distances")
+        heights_A = A[:, 2] if heights_A is None else heights_A
+        heights_B = B[:, 2] if heights_B is None else heights_B
+
+    heights_A = np.asarray(heights_A, 'double')
+    heights_B = np.asarray(heights_B, 'double')
+
+    # Number of pairs merged in each row
+    pairs_A = np.prod(merge_sizes(A), axis=0)
+    pairs_B = np.prod(merge_sizes(B), axis=0)
+
+    # The cost depends on the order of the hierarchies and on their depth, so use the cheapest
+    options = []
+    for arguments in [(A, B, heights_A, heights_B), (B, A, heights_B, heights_A)]:
+        costs = cross_costs(*arguments[:2])
+        options += [(costs[0], cross_products, arguments), (costs[1], cross_products_paths, arguments)]
+
+    _, method, arguments = min(options, key=lambda option: option[0])
+    AB = method(*arguments)
+
+    return {'N': n * (n - 1) // 2,
+            'A': np.sum(pairs_A * heights_A),
+            'B': np.sum(pairs_B * heights_B),
+            'AA': np.sum(pairs_A * heights_A ** 2),
+            'BB': np.sum(pairs_B * heights_B ** 2),
+            'AB': AB}
+
+
+def correlation(sums):
+
+    """
+    Calculates the Pearson correlation over all pairs of objects from
+    the sums calculated by ``cophenetic_sums``.
+    """
+
+    N = sums['N']
+    covariance = N * sums['AB'] - sums['A'] * sums['B']
+    variance_A = N * sums['AA'] - sums['A'] ** 2
+    variance_B = N * sums['BB'] - sums['B'] ** 2
+    return covariance / np.sqrt(variance_A * variance_B)
+
+
+def cophenetic_correlation(A, B, validate='numpy'):
+
+    """
+    Calculates the correlation between the cophenetic distances of two
+    hierarchical clusterings, i.e. the heights at which each pair of
+    objects is first placed into the same cluster, without forming the
+    :math:`n(n-1)/2` distances needed by ``scipy.cluster.hierarchy.cophenet``.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    r : float
+        The cophenetic correlation.
+    """
+
+    return correlation(cophenetic_sums(A, B, validate=validate))
+
+
+def baker_gamma(A, B, validate='numpy'):
+
+    """
+    Calculates Baker's gamma, the Spearman rank correlation between the
+    merges at which each pair of objects is first placed into the same
+    cluster in the two hierarchical clusterings.
+
+    The pairs merged in row :math:`k` are tied, so they share the mean
+    of their ranks :math:`P_{k-1} + (a_k b_k + 1)/2`, where :math:`a_k`
+    and :math:`b_k` are the sizes of the merged clusters. The Pearson
+    correlation of these ranks is the Spearman correlation.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    gamma : float
+        Baker's gamma.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    ranks = []
+    for Z in [A, B]:
+        pairs = np.prod(merge_sizes(Z), axis=0)
+        ranks.append(np.cumsum(pairs) - pairs + (pairs + 1) / 2)
+
+    return correlation(cophenetic_sums(A, B, *ranks, validate=None))
@@ -0,0 +1,198 @@
+import numpy as np
+
+from library.linkages import check_linkage, check_linkages, merge_sizes, pairs_from_sizes
+
+
+def prepare_hierarchy(Z, weights=None):
+
+    """
+    Resolves the relabelling of ``matching_matrix`` for one hierarchical
+    clustering in advance, in a vectorised pass that does not depend on
+    the hierarchy it is compared with.
+
+    Each cluster is stored under the index of one of its objects, its
+    representative, which is the representative of the larger of the two
+    clusters merged to form it (the second on ties, as in ``relabel_A``).
+    Following the larger child from every node until a leaf is reached is
+    done by pointer jumping, in :math:`O(n \\log d)` for a hierarchy of
+    depth :math:`d`.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+
+    Returns
+    -------
+    source : ndarray
+        The representative of the smaller cluster merged in each row,
+        which is removed.
+    target : ndarray
+        The representative of the larger cluster merged in each row,
+        into which the smaller one is merged.
+    pairs : ndarray
+        The number of pairs of objects in the same cluster after each
+        merge, i.e. :math:`P` or :math:`Q`, not counting the pairs
+        within weighted leaves.
+    """
+
+    n = len(Z) + 1
+    merges = Z[:, :2].astype(np.intp)
+    sizes_1, sizes_2 = merge_sizes(Z, weights)
+
+    larger = np.where(sizes_1 > sizes_2, merges[:, 0], merges[:, 1])
+    smaller = np.where(sizes_1 > sizes_2, merges[:, 1], merges[:, 0])
+
+    pointer = np.concatenate([np.arange(n), larger])
+    while True:
+        jumped = pointer[pointer]
+        if np.array_equal(jumped, pointer):
+            break
+        pointer = jumped
+
+    return pointer[smaller], pointer[larger], pairs_from_sizes(sizes_1, sizes_2)
+
+
+def sweep_chunks(prepared_A, prepared_B, chunk_size, weights=None):
+
+    """
+    Calculates :math:`T` after each merge like ``sweep_prepared``, but
+    yields it every ``chunk_size`` merges, so that the sweep can be
+    paused between the chunks or abandoned.
+
+    Parameters
+    ----------
+    prepared_A, prepared_B : tuple
+        The output of ``prepare_hierarchy`` for A and B.
+    chunk_size : int
+        The number of merges in each chunk.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+
+    Yields
+    ------
+    T : ndarray
+        :math:`T` after each of the next ``chunk_size`` merges, or the
+        remaining merges for the last chunk.
+    """
+
+    source_A, target_A, _ = prepared_A
+    source_B, target_B, _ = prepared_B
+    n = len(source_A) + 1
+
+    weights = [1] * n if weights is None else [int(w) for w in weights]
+    rows = {x : {x : w} for x, w in enumerate(weights)}
+    columns = {x : {x : w} for x, w in enumerate(weights)}
+    total = sum(w * (w - 1) // 2 for w in weights)
+
+    merges = zip(source_A[:n - 2].tolist(), target_A[:n - 2].tolist(),
+                 source_B[:n - 2].tolist(), target_B[:n - 2].tolist())
+
+    for start in range(0, n - 2, chunk_size):
+
+        T = np.zeros(min(chunk_size, n - 2 - start))
+
+        for k, (i_1, i_2, j_1, j_2) in zip(range(len(T)), merges):
+
+            r1, r2 = rows.pop(i_1), rows[i_2]
+            for elem, value_1 in r1.items():
+                column = columns[elem]
+                del column[i_1]
+                if elem in r2:
+                    value_2 = r2[elem]
+                    r2[elem] = column[i_2] = value_1 + value_2
+                    total += value_1 * value_2
+                else:
+                    r2[elem] = column[i_2] = value_1
+
+            c1, c2 = columns.pop(j_1), columns[j_2]
+            for elem, value_1 in c1.items():
+                row = rows[elem]
+                del row[j_1]
+                if elem in c2:
+                    value_2 = c2[elem]
+                    c2[elem] = row[j_2] = value_1 + value_2
+                    total += value_1 * value_2
+                else:
+                    c2[elem] = row[j_2] = value_1
+
+            T[k] = total
+
+        yield T
+
+
+def sweep_prepared(prepared_A, prepared_B, weights=None):
+
+    """
+    Calculates :math:`T` after each merge from two hierarchies resolved
+    by ``prepare_hierarchy``. Only the rows and columns of the matching
+    matrix are updated in the loop, as the labels to merge are known in
+    advance.
+
+    Parameters
+    ----------
+    prepared_A, prepared_B : tuple
+        The output of ``prepare_hierarchy`` for A and B.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+
+    Returns
+    -------
+    T : ndarray
+        A vector of size :math:`n-2` where the ``k``'th element is
+        :math:`T` after the ``k``'th merge.
+    """
+
+    n = len(prepared_A[0]) + 1
+    return np.concatenate([np.zeros(0)] + list(sweep_chunks(prepared_A, prepared_B, max(1, n - 2), weights)))
+
+
+def TPQ_prepared(A, B, weights=None, executor=None, validate='numpy'):
+
+    """
+    Calculates the same statistics as ``similarity_metrics.TPQ_linkages``
+    in two phases. The hierarchies are first resolved independently by
+    ``prepare_hierarchy``, in parallel if an executor is given, and then
+    :math:`T` is accumulated by ``sweep_prepared``. :math:`P` and
+    :math:`Q` come from the first phase.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+    executor : concurrent.futures.Executor, optional
+        Executor used to prepare A and B at the same time.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    T, P, Q : ndarray
+        The statistics after each of the first :math:`n-2` merges.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    if executor is None:
+        prepared_A = prepare_hierarchy(A, weights)
+        prepared_B = prepare_hierarchy(B, weights)
+    else:
+        future_A = executor.submit(prepare_hierarchy, A, weights)
+        future_B = executor.submit(prepare_hierarchy, B, weights)
+        prepared_A, prepared_B = future_A.result(), future_B.result()
+
+    within = 0 if weights is None else sum(int(w) * (int(w) - 1) // 2 for w in weights)
+
+    T = sweep_prepared(prepared_A, prepared_B, weights)
+    P = within + prepared_A[2][:n - 2]
+    Q = within + prepared_B[2][:n - 2]
+    return T, P, Q
@@ -0,0 +1,78 @@
+import hashlib
+import numpy as np
+
+
+def linkage_digest(Z):
+
+    """
+    Computes a digest of a linkage matrix which can be used as a key
+    when caching statistics computed from it.
+
+    Only the first two columns (the labels of the merged clusters) are
+    hashed since these are the only columns used when calculating
+    :math:`T`, :math:`P` and :math:`Q`.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+
+    Returns
+    -------
+    digest : str
+        A hexadecimal digest of the merges in ``Z``.
+    """
+
+    merges = np.ascontiguousarray(np.asarray(Z)[:, :2], dtype=np.int64)
+    return hashlib.blake2b(merges.tobytes(), digest_size=16).hexdigest()
+
+
+def pair_key(A, B):
+
+    """
+    Computes an order-normalised key for a pair of linkage matrices.
+
+    Swapping ``A`` and ``B`` leaves :math:`T` unchanged and swaps
+    :math:`P` with :math:`Q`, so both orders share a single key. The
+    pair should be computed in the canonical order ``(A, B)`` when
+    ``swapped`` is false and ``(B, A)`` otherwise, swapping :math:`P`
+    and :math:`Q` of the result back when ``swapped`` is true.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+
+    Returns
+    -------
+    key : str
+        A hexadecimal key shared by ``(A, B)`` and ``(B, A)``.
+    swapped : bool
+        Whether the canonical order of the pair is ``(B, A)``.
+    """
+
+    digest_A, digest_B = linkage_digest(A), linkage_digest(B)
+    swapped = digest_B < digest_A
+
+    if swapped:
+        digest_A, digest_B = digest_B, digest_A
+
+    key = hashlib.blake2b((digest_A + digest_B).encode(), digest_size=16)
+    return key.hexdigest(), swapped
+
+
+def data_digest(X):
+
+    """
+    Computes a digest of a data matrix, including its shape and type,
+    which can be used as a key when caching linkages computed from it.
+    """
+
+    X = np.ascontiguousarray(X)
+    header = ('%s%r' % (X.dtype.str, X.shape)).encode()
+    return hashlib.blake2b(header + X.tobytes(), digest_size=16).hexdigest()
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def rand(T, P, Q, N):
+
+    """
+    Calculates the rand score from the statistics :math:`T`, :math:`P`
+    and :math:`Q`, where :math:`N` is the total number of pairs
+
+    math::
+      R_k = \\frac{N - P_k - Q_k + 2 T_k}{N}
+    """
+
+    return (N - P - Q + 2 * T) / N
+
+
+def adjusted_rand(T, P, Q, N):
+
+    """
+    Calculates the adjusted rand score from the statistics :math:`T`,
+    :math:`P` and :math:`Q`, where :math:`N` is the total number of pairs
+
+    math::
+      AR_k = \\frac{2 (N T_k - P_k Q_k)}{N (P_k + Q_k) - 2 P_k Q_k}
+    """
+
+    return 2 * (N * T - P * Q) / (N * (P + Q) - 2 * P * Q)
+
+
+def fowlkes_mallows(T, P, Q, N):
+
+    """
+    Calculates the Fowlkes and Mallows index from the statistics
+    :math:`T`, :math:`P` and :math:`Q`
+
+    math::
+      B_k = \\frac{T_k}{\\sqrt{P_k Q_k}}
+    """
+
+    return T / np.sqrt(P * Q)
+
+
+def adjusted_fowlkes_mallows(T, P, Q, N):
+
+    """
+    Calculates the Fowlkes and Mallows index adjusted for chance from
+    the statistics :math:`T`, :math:`P` and :math:`Q`, where :math:`N`
+    is the total number of pairs
+
+    math::
+      AB_k = \\frac{B_k - E[B_k]}{1 - E[B_k]}, \\quad E[B_k] = \\frac{\\sqrt{P_k Q_k}}{N}
+    """
+
+    expected = np.sqrt(P * Q) / N
+    return (fowlkes_mallows(T, P, Q, N) - expected) / (1 - expected)
+
+
+def index_function(index):
+
+    """
+    Finds the function used to calculate an index from its name. The
+    names are the same as those accepted by
+    ``similarity_metrics.get_index``.
+
+    Each of the functions is increasing in :math:`T` for fixed
+    :math:`P` and :math:`Q`.
+    """
+
+    index = index.lower()
+
+    if index in ['r', 'rand']:
+        return rand
+
+    if index in ['ar', 'adjustedrand', 'adjusted_rand']:
+        return adjusted_rand
+
+    if index in ['b', 'fm', 'fowlkesmallows', 'fowlkes_mallows']:
+        return fowlkes_mallows
+
+    if index in ['afm', 'adjustedfowlkesmallows', 'adjusted_fowlkes_mallows']:
+        return adjusted_fowlkes_mallows
+
+    raise ValueError("Unknown index '%s'" % index)
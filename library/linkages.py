@@ -0,0 +1,439 @@
+import numpy as np
+
+
+def is_valid_linkage(Z, throw=False, name=None):
+
+    """
+    Checks the validity of a linkage matrix using NumPy only.
+
+    The checks are the same as those performed by
+    ``scipy.cluster.hierarchy.is_valid_linkage``, which is not used
+    here so that importing the library does not require importing SciPy.
+
+    Parameters
+    ----------
+    Z : ndarray
+        Linkage matrix.
+    throw : bool
+        When True, raises an exception if the linkage matrix is invalid.
+    name : str, optional
+        The name of the linkage matrix used in the exception message.
+
+    Returns
+    -------
+    b : bool
+        True if the linkage matrix is valid and False otherwise.
+    """
+
+    name_str = '%r ' % name if name else ''
+
+    try:
+        if Z.dtype != np.float64:
+            raise TypeError('Linkage matrix %smust contain doubles.' % name_str)
+        if Z.ndim != 2:
+            raise ValueError('Linkage matrix %smust have shape=2 (i.e. be two-dimensional).' % name_str)
+        if Z.shape[1] != 4:
+            raise ValueError('Linkage matrix %smust have 4 columns.' % name_str)
+        if Z.shape[0] == 0:
+            raise ValueError('Linkage must be computed on at least two observations.')
+
+        n = Z.shape[0]
+        if n > 1:
+            if np.any(Z[:, :2] < 0):
+                raise ValueError('Linkage %scontains negative indices.' % name_str)
+            if np.any(Z[:, 2] < 0):
+                raise ValueError('Linkage %scontains negative distances.' % name_str)
+            if np.any(Z[:, 3] < 0):
+                raise ValueError('Linkage %scontains negative counts.' % name_str)
+            if np.any(Z[:, 3] > n + 1):
+                raise ValueError('Linkage %scontains excessive observations in a cluster' % name_str)
+            if np.any(np.max(Z[:, :2], axis=1) >= np.arange(n + 1, 2 * n + 1)):
+                raise ValueError('Linkage %suses non-singleton cluster before it is formed.' % name_str)
+            if len(np.unique(Z[:, :2])) < n * 2:
+                raise ValueError('Linkage %suses the same cluster more than once.' % name_str)
+
+    except (TypeError, ValueError):
+        if throw:
+            raise
+        return False
+
+    return True
+
+
+def is_merge_array(Z):
+
+    """
+    Whether ``Z`` is an integer :math:`(n-1)` by 2 array of merges, such
+    as the ``children_`` attribute of scikit-learn's
+    ``AgglomerativeClustering``, rather than a linkage matrix.
+    """
+
+    return Z.ndim == 2 and Z.shape[1] == 2 and np.issubdtype(Z.dtype, np.integer)
+
+
+def is_valid_merges(Z, throw=False, name=None):
+
+    """
+    Checks the validity of an integer :math:`(n-1)` by 2 array of
+    merges. The checks are those made by ``is_valid_linkage`` on the
+    first two columns of a linkage matrix.
+
+    Parameters
+    ----------
+    Z : ndarray
+        Array of merges.
+    throw : bool
+        When True, raises an exception if the array is invalid.
+    name : str, optional
+        The name of the array used in the exception message.
+
+    Returns
+    -------
+    b : bool
+        True if the array of merges is valid and False otherwise.
+    """
+
+    name_str = '%r ' % name if name else ''
+
+    try:
+        if not np.issubdtype(Z.dtype, np.integer):
+            raise TypeError('Merge array %smust contain integers.' % name_str)
+        if Z.ndim != 2 or Z.shape[1] != 2:
+            raise ValueError('Merge array %smust have 2 columns.' % name_str)
+        if Z.shape[0] == 0:
+            raise ValueError('Linkage must be computed on at least two observations.')
+
+        n = Z.shape[0]
+        if np.any(Z < 0):
+            raise ValueError('Merge array %scontains negative indices.' % name_str)
+        if np.any(np.max(Z, axis=1) >= np.arange(n + 1, 2 * n + 1)):
+            raise ValueError('Merge array %suses non-singleton cluster before it is formed.' % name_str)
+        if len(np.unique(Z)) < n * 2:
+            raise ValueError('Merge array %suses the same cluster more than once.' % name_str)
+
+    except (TypeError, ValueError):
+        if throw:
+            raise
+        return False
+
+    return True
+
+
+def check_linkage(Z, validate='numpy'):
+
+    """
+    Converts a linkage matrix to an array and checks that it is valid.
+
+    Integer :math:`(n-1)` by 2 arrays of merges are accepted and
+    returned without conversion. Any other input is converted to an
+    array of doubles, which is only copied if it is not one already.
+
+    Parameters
+    ----------
+    Z : ndarray
+        The linkage matrix or array of merges.
+    validate : str or None
+        Either 'numpy' to check the linkage with ``is_valid_linkage``,
+        'scipy' to check it with SciPy's ``is_valid_linkage`` (SciPy
+        is only imported in this case) or None to skip the checks.
+        Arrays of merges are always checked with ``is_valid_merges``
+        unless ``validate`` is None.
+
+    Returns
+    -------
+    Z : ndarray
+        The linkage matrix as an array of doubles or the array of merges.
+    """
+
+    if validate not in ['numpy', 'scipy', None]:
+        raise ValueError("Unknown validation '%s'" % validate)
+
+    Z = np.asarray(Z)
+
+    if is_merge_array(Z):
+        if validate is not None:
+            is_valid_merges(Z, throw=True)
+        return Z
+
+    # Convert to array if not already.
+    Z = np.asarray(Z, 'double')
+
+    # Performs checks
+    if validate == 'scipy':
+        from scipy.cluster.hierarchy import is_valid_linkage as scipy_is_valid_linkage
+        scipy_is_valid_linkage(Z, throw=True)
+
+    elif validate == 'numpy':
+        is_valid_linkage(Z, throw=True)
+
+    return Z
+
+
+def check_linkages(A, B, validate='numpy'):
+
+    """
+    Converts two linkage matrices to arrays and checks that they are
+    valid linkages of the same set of objects, see ``check_linkage``.
+
+    Returns
+    -------
+    A, B : ndarray
+        The linkage matrices as arrays of doubles, or arrays of merges.
+    n : int
+        The number of objects in the hierarchical clusterings.
+    """
+
+    A = check_linkage(A, validate)
+    B = check_linkage(B, validate)
+
+    n = len(A) + 1
+    n2 = len(B) + 1
+
+    if n != n2:
+        raise ValueError("The hierarchical clusterings must be of the same size")
+
+    return A, B, n
+
+
+def suffix_sums(following, values, spacing=32):
+
+    """
+    Sums the values from each element of a linked list to its end (list
+    ranking), without following the list one element at a time.
+
+    About one element in ``spacing`` is chosen as a ruler. The list is
+    followed from all the rulers at once until the next ruler is
+    reached, which takes about :math:`spacing \\log n` vectorised steps
+    in total, and the shorter list of rulers is then ranked by pointer
+    jumping. The work is :math:`O(n)`, against :math:`O(n \\log n)` for
+    pointer jumping over the whole list.
+
+    Parameters
+    ----------
+    following : ndarray
+        The index of the element after each element. The last element
+        ends the list, follows itself and is the only one to do so.
+    values : ndarray
+        The value of each element. The value of the last element must
+        be zero.
+    spacing : int
+        The mean number of elements between rulers.
+
+    Returns
+    -------
+    sums : ndarray
+        The sum of the values from each element to the end of the list.
+    """
+
+    N = len(following)
+    end = N - 1
+
+    # The rulers are spread pseudo-randomly and include the heads of the list and its end
+    ruler = (np.arange(N, dtype=np.uint64) * 2654435761 % 2 ** 32) < 2 ** 32 // spacing
+    ruler[np.bincount(following[:end], minlength=N) == 0] = True
+    ruler[end] = True
+    rulers = np.flatnonzero(ruler)
+    R = len(rulers)
+
+    # The ruler preceding each element and the sum of the values from it to the element
+    label = np.empty(N, dtype=np.intp)
+    label[rulers] = np.arange(R)
+    offset = np.zeros(N, dtype=values.dtype)
+
+    # The next ruler after each ruler and the sum of the values between them
+    after = np.full(R, R - 1, dtype=np.intp)
+    between = values[rulers]
+
+    walker = np.arange(R - 1)
+    current = following[rulers[:-1]]
+    total = between[:-1].copy()
+
+    while len(current):
+        reached = ruler[current]
+        after[walker[reached]] = label[current[reached]]
+        between[walker[reached]] = total[reached]
+
+        walking = ~reached
+        current, total, walker = current[walking], total[walking], walker[walking]
+        label[current] = walker
+        offset[current] = total
+        total = total + values[current]
+        current = following[current]
+
+    while np.any(after != R - 1):
+        between = between + between[after]
+        after = after[after]
+
+    return between[label] - offset
+
+
+def leaf_order(Z):
+
+    """
+    Orders the objects of a hierarchical clustering so that the objects
+    of every cluster are consecutive, as in a dendrogram, without
+    replaying the merges.
+
+    The order is that of an Euler tour of the tree, visiting the first
+    cluster of each merge before the second. The successor of each step
+    of the tour only depends on the parent and children of a node, and
+    the number of objects visited after each step is found by
+    ``suffix_sums``, in :math:`O(n)` whatever the depth of the
+    hierarchy.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+
+    Returns
+    -------
+    start : ndarray
+        The position of the first object of each of the :math:`2n-1`
+        nodes, the objects followed by the clusters formed by each
+        merge.
+    sizes : ndarray
+        The number of objects in each of the nodes.
+    """
+
+    n = len(Z) + 1
+    first, second = Z[:, 0].astype(np.intp), Z[:, 1].astype(np.intp)
+    rows = np.arange(n - 1)
+
+    # The row in which each node is merged and whether it is the first cluster of that row
+    parent = np.full(2 * n - 1, n - 1, dtype=np.intp)
+    parent[first] = rows
+    parent[second] = rows
+    is_first = np.zeros(2 * n - 1, dtype=bool)
+    is_first[first] = True
+
+    # Step k enters the cluster formed in row k and step n - 1 + k leaves it,
+    # step 2n - 2 ends the tour. The objects are visited between the steps
+    # and the value of a step is the number of objects visited after it.
+    end = 2 * n - 2
+    following = np.empty(end + 1, dtype=np.intp)
+    entered = np.zeros(end + 1, dtype=np.intp)
+
+    # Entering a cluster visits its first child and then its second child
+    # unless they are objects, and leaves it if both are objects
+    leaf_1, leaf_2 = first < n, second < n
+    following[:n - 1] = np.where(~leaf_1, first - n, np.where(~leaf_2, second - n, n - 1 + rows))
+    entered[:n - 1] = leaf_1.astype(np.intp) + (leaf_1 & leaf_2)
+
+    # Leaving a first child visits its sibling, leaving a second child
+    # leaves the parent
+    up = parent[n:]
+    sibling = second[np.minimum(up, n - 2)]
+    visit = is_first[n:] & (sibling >= n)
+    following[n - 1:end] = np.where(visit, sibling - n, n - 1 + up)
+    entered[n - 1:end] = is_first[n:] & (sibling < n)
+    following[end - 1] = end
+    entered[end - 1] = 0
+    following[end] = end
+
+    remaining = suffix_sums(following, entered)
+
+    # Internal nodes first, then the objects from the clusters they are merged into
+    start = np.empty(2 * n - 1, dtype=np.intp)
+    sizes = np.ones(2 * n - 1, dtype=np.intp)
+    start[n:] = n - remaining[:n - 1]
+    sizes[n:] = remaining[:n - 1] - remaining[n - 1:end]
+    start[first] = start[n:]
+    start[second] = start[n:] + sizes[first]
+    return start, sizes
+
+
+def merge_sizes(Z, weights=None):
+
+    """
+    Calculates the number of objects in each of the two clusters merged
+    in every row of a linkage matrix.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering) or an :math:`(n-1)` by 2 array of
+        merges, in which case the sizes are derived from the merges.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves. The sizes are
+        derived from the merges if this is given.
+
+    Returns
+    -------
+    sizes_1, sizes_2 : ndarray
+        Vectors of size :math:`n-1` where the ``k``'th elements are the
+        sizes of the first and second clusters merged in the ``k``'th
+        row.
+    """
+
+    n = len(Z) + 1
+
+    if weights is not None or is_merge_array(Z):
+        start, sizes = leaf_order(Z)
+        if weights is not None:
+            ordered = np.zeros(n)
+            ordered[start[:n]] = np.asarray(weights, 'double')
+            cumulative = np.concatenate([[0], np.cumsum(ordered)])
+            sizes = cumulative[start + sizes] - cumulative[start]
+        sizes = np.asarray(sizes, 'double')
+    else:
+        sizes = np.concatenate([np.ones(n), Z[:, 3]])
+
+    return sizes[Z[:, 0].astype(np.intp)], sizes[Z[:, 1].astype(np.intp)]
+
+
+def pairs_from_sizes(sizes_1, sizes_2):
+
+    """
+    Calculates the number of pairs of objects placed into the same
+    cluster after each merge, i.e. :math:`P` or :math:`Q`, from the
+    sizes of the merged clusters.
+    """
+
+    return np.cumsum(sizes_1 * sizes_2)
+
+
+def cut_labels(Z, k):
+
+    """
+    Finds the cluster of each object after the ``k``'th merge of a
+    hierarchical clustering, i.e. with :math:`n-k-1` clusters, without
+    replaying the merges.
+
+    Each node points to the node formed when it is merged, and the
+    pointers are followed by pointer jumping until they reach a node
+    which has not been merged by the ``k``'th merge. This takes
+    :math:`O(n \\log d)` for a hierarchy of depth :math:`d`.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    k : int
+        The last merge carried out, or -1 for no merges.
+
+    Returns
+    -------
+    labels : ndarray
+        The label of the cluster of each object as used in the linkage,
+        i.e. :math:`i` for an object still in a cluster on its own and
+        :math:`n+j` for the cluster formed by the ``j``'th merge.
+    """
+
+    n = len(Z) + 1
+    merges = Z[:k + 1, :2].astype(np.intp)
+
+    pointer = np.arange(n + k + 1)
+    pointer[merges[:, 0]] = np.arange(n, n + k + 1)
+    pointer[merges[:, 1]] = np.arange(n, n + k + 1)
+
+    while True:
+        jumped = pointer[pointer]
+        if np.array_equal(jumped, pointer):
+            break
+        pointer = jumped
+
+    return pointer[:n]
@@ -1,3 +1,5 @@
+import numpy as np
+
 class matching_matrix():
 
     """        
@@ -16,33 +18,218 @@ class matching_matrix():
     :math:`A` and :math:`B` until there is only one cluster left in each 
     and the matching matrix is :math:`[n]` 
 
+    When each object stands for several identical objects the initial
+    matching matrix is instead a diagonal matrix of the multiplicities
+    and the pairs within each object are counted in T, P and Q from the
+    start, so the results are the same as for the expanded objects.
+
     Parameters
     ----------
     n : integer
         An integer for the size of the initial matching matrix.  
 
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` objects.
+
     """
 
-    def __init__(self, n):        
+    def __init__(self, n, weights=None):        
+
+        if weights is None:
+
+            # The matrix itself 
+            self.rows = {x : {x:1} for x in range(n)}
+            self.columns = {x : {x:1} for x in range(n)}
+            
+            # Row and column totals 
+            self.rtot = {x : 1 for x in range(n)}
+            self.ctot = {x : 1 for x in range(n)}
+            
+            # TPQ
+            self.T = 0 
+            self.P = 0 
+            self.Q = 0 
+
+        else:
+
+            weights = [int(w) for w in weights]
+            if len(weights) != n:
+                raise ValueError("There must be a weight for each of the n objects")
+
+            self.rows = {x : {x:w} for x, w in enumerate(weights)}
+            self.columns = {x : {x:w} for x, w in enumerate(weights)}
+            self.rtot = {x : w for x, w in enumerate(weights)}
+            self.ctot = {x : w for x, w in enumerate(weights)}
+
+            # Pairs of identical objects are in the same cluster in both clusterings
+            self.T = self.P = self.Q = sum(w * (w - 1) // 2 for w in weights)
 
-        # The matrix itself 
-        self.rows = {x : {x:1} for x in range(n)}
-        self.columns = {x : {x:1} for x in range(n)}
-        
-        # Row and column totals 
-        self.rtot = {x : 1 for x in range(n)}
-        self.ctot = {x : 1 for x in range(n)}
         self.n = n
-        
-        # TPQ
-        self.T = 0 
-        self.P = 0 
-        self.Q = 0 
 
         # Dictionaries used for the relabelling procedure
         self.update_A = {}
         self.update_B = {}
 
+    @classmethod
+    def from_labels(cls, n, labels_A, labels_B, weights=None):
+
+        """
+        Creates the matching matrix of two flat clusterings part way
+        through the hierarchies, so that the remaining merges can be
+        carried out with ``merge``. The contingency table is counted in
+        a single vectorised pass.
+
+        Each cluster is stored under the index of one of its objects, and
+        ``update_A`` and ``update_B`` map the labels of the clusters
+        formed by merges to these indices, as if the earlier merges had
+        been carried out.
+
+        Parameters
+        ----------
+        n : integer
+            The number of objects.
+        labels_A, labels_B : ndarray
+            The label of the cluster of each object in A and B, as used
+            in the linkages (see ``cut_labels``).
+        weights : sequence of integers, optional
+            The multiplicity of each of the :math:`n` objects.
+
+        Returns
+        -------
+        m : matching_matrix
+            The matching matrix of the two clusterings.
+        """
+
+        labels_A = np.asarray(labels_A, dtype=np.intp)
+        labels_B = np.asarray(labels_B, dtype=np.intp)
+        w = None if weights is None else np.asarray(weights, dtype=np.int64)
+
+        # Representative object of each cluster and its position among the clusters
+        compact, representatives = [], []
+        for labels in [labels_A, labels_B]:
+            representative = np.full(2 * n - 1, -1, dtype=np.intp)
+            representative[labels[::-1]] = np.arange(n)[::-1]
+            clusters = np.flatnonzero(representative >= 0)
+            position = np.zeros(2 * n - 1, dtype=np.intp)
+            position[clusters] = np.arange(len(clusters))
+            compact.append(position[labels])
+            representatives.append((clusters, representative[clusters]))
+
+        (clusters_A, rep_A), (clusters_B, rep_B) = representatives
+        m_A, m_B = len(clusters_A), len(clusters_B)
+
+        # Contingency table as counts of each non-zero cell
+        cells = compact[0].astype(np.int64) * m_B + compact[1]
+        if m_A * m_B <= 4 * n:
+            counts = np.bincount(cells, w, minlength=m_A * m_B)
+            cells = np.flatnonzero(counts)
+            counts = counts[cells]
+        else:
+            cells, inverse = np.unique(cells, return_inverse=True)
+            counts = np.bincount(inverse.ravel(), w)
+        counts = counts.astype(np.int64)
+
+        rows_i = rep_A[cells // m_B].tolist()
+        columns_j = rep_B[cells % m_B].tolist()
+
+        m = cls.__new__(cls)
+        m.n = n
+        m.rows = {i : {} for i in rep_A.tolist()}
+        m.columns = {j : {} for j in rep_B.tolist()}
+        for i, j, count in zip(rows_i, columns_j, counts.tolist()):
+            m.rows[i][j] = m.columns[j][i] = count
+
+        row_totals = np.bincount(compact[0], w, minlength=m_A).astype(np.int64)
+        column_totals = np.bincount(compact[1], w, minlength=m_B).astype(np.int64)
+        m.rtot = dict(zip(rep_A.tolist(), row_totals.tolist()))
+        m.ctot = dict(zip(rep_B.tolist(), column_totals.tolist()))
+
+        pairs = lambda x: int(np.sum(x * (x - 1) // 2))
+        m.T, m.P, m.Q = pairs(counts), pairs(row_totals), pairs(column_totals)
+
+        m.update_A = {c : i for c, i in zip(clusters_A.tolist(), rep_A.tolist()) if c >= n}
+        m.update_B = {c : j for c, j in zip(clusters_B.tolist(), rep_B.tolist()) if c >= n}
+        return m
+
+    def copy(self):
+
+        """
+        Creates an independent copy of the matching matrix, for example to
+        continue merging from the same state along two different
+        hierarchical clusterings.
+
+        Returns
+        -------
+        m : matching_matrix
+            A matching matrix that can be merged without changing this one.
+        """
+
+        m = matching_matrix.__new__(matching_matrix)
+        m.rows = {x : dict(row) for x, row in self.rows.items()}
+        m.columns = {x : dict(column) for x, column in self.columns.items()}
+        m.rtot = dict(self.rtot)
+        m.ctot = dict(self.ctot)
+        m.T, m.P, m.Q = self.T, self.P, self.Q
+        m.n = self.n
+        m.update_A = dict(self.update_A)
+        m.update_B = dict(self.update_B)
+        return m
+
+    def to_sparse(self, format='csr'):
+
+        """
+        Creates a sparse contingency table from the matching matrix, in
+        time proportional to the number of non-zero elements rather than
+        the size of the dense table. Requires SciPy.
+
+        The rows and columns are the current clusters of A and B, labelled
+        as in the linkages, i.e. :math:`i` for an object that is still in
+        a cluster on its own and :math:`n+k` for the cluster formed by the
+        :math:`k`'th merge, sorted by label.
+
+        Parameters
+        ----------
+        format : str
+            The format of the sparse matrix, either 'csr' or 'coo'.
+
+        Returns
+        -------
+        M : scipy.sparse matrix
+            The number of objects in each pair of clusters of A and B.
+        row_labels : ndarray
+            The label of the cluster of A in each row.
+        column_labels : ndarray
+            The label of the cluster of B in each column.
+        """
+
+        from scipy.sparse import coo_matrix
+
+        # The current label of the row or column stored under each index
+        # and the position of each index once sorted by label
+        positions, sorted_labels = [], []
+        for totals, update in [(self.rtot, self.update_A), (self.ctot, self.update_B)]:
+            label = {x : x for x in totals}
+            label.update({x : k for k, x in update.items()})
+            order = sorted(label, key=label.get)
+            positions.append({x : i for i, x in enumerate(order)})
+            sorted_labels.append(np.array([label[x] for x in order], dtype=np.int64))
+
+        row_position, column_position = positions
+        row_labels, column_labels = sorted_labels
+
+        nnz = sum(len(row) for row in self.rows.values())
+        i = np.fromiter((row_position[x] for x, row in self.rows.items() for y in row), np.int64, nnz)
+        j = np.fromiter((column_position[y] for row in self.rows.values() for y in row), np.int64, nnz)
+        values = np.fromiter((v for row in self.rows.values() for v in row.values()), np.int64, nnz)
+
+        M = coo_matrix((values, (i, j)), shape=(len(row_labels), len(column_labels)))
+        if format == 'csr':
+            M = M.tocsr()
+        elif format != 'coo':
+            raise ValueError("format must be either 'csr' or 'coo'")
+
+        return M, row_labels, column_labels
+
     def relabel_A(self, i_1, i_2, k):
     
         """
@@ -0,0 +1,87 @@
+from library.matching_matrices.matching_matrix import matching_matrix
+
+class matching_matrix_events(matching_matrix):
+
+    """
+    Matching matrix which records the changes made by each merge, so
+    that statistics other than T, P and Q can be updated incrementally
+    (see ``library.accumulators``).
+
+    Each merge of two clusters of A adds the elements of the smaller row
+    to the larger. When both rows have an element in the same column the
+    two elements :math:`v_1` and :math:`v_2` are replaced by
+    :math:`v_1 + v_2`, which is recorded in ``cells`` as
+    ``(v_1, v_2, row, column)`` using the index of the larger row. The
+    same is done for the columns when clusters of B merge. Elements that
+    only move to a different row or column keep their value and are not
+    recorded. The totals of the two merged rows and columns are recorded
+    in ``row_totals`` and ``column_totals``.
+
+    Parameters
+    ----------
+    n : integer
+        An integer for the size of the initial matching matrix.
+
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` objects.
+
+    """
+
+    def __init__(self, n, weights=None):
+
+        super().__init__(n, weights)
+        self.clear()
+
+    def clear(self):
+
+        """
+        Removes the recorded changes, normally after each merge.
+        """
+
+        self.cells = []
+        self.row_totals = None
+        self.column_totals = None
+
+    def update_row_totals_and_P(self, i_1, i_2):
+
+        self.row_totals = (self.rtot[i_1], self.rtot[i_2])
+        super().update_row_totals_and_P(i_1, i_2)
+
+    def update_column_totals_and_Q(self, j_1, j_2):
+
+        self.column_totals = (self.ctot[j_1], self.ctot[j_2])
+        super().update_column_totals_and_Q(j_1, j_2)
+
+    def update_row_dictionary_and_T(self, i_1, i_2):
+
+        r1, r2 = self.rows.pop(i_1), self.rows[i_2]
+        cells = self.cells
+
+        for elem in r1:
+
+            if elem in r2:
+                value_1 = self.columns[elem].pop(i_1)
+                value_2 = self.columns[elem][i_2]
+                r2[elem] = self.columns[elem][i_2] = value_1 + value_2
+                self.T += value_1 * value_2
+                cells.append((value_1, value_2, i_2, elem))
+
+            else:
+                r2[elem] = self.columns[elem][i_2] = self.columns[elem].pop(i_1)
+
+    def update_column_dictionary_and_T(self, j_1, j_2):
+
+        c1, c2 = self.columns.pop(j_1), self.columns[j_2]
+        cells = self.cells
+
+        for elem in c1:
+
+            if elem in c2:
+                value_1 = self.rows[elem].pop(j_1)
+                value_2 = self.rows[elem][j_2]
+                c2[elem] = self.rows[elem][j_2] = value_1 + value_2
+                self.T += value_1 * value_2
+                cells.append((value_1, value_2, elem, j_2))
+
+            else:
+                c2[elem] = self.rows[elem][j_2] = self.rows[elem].pop(j_1)
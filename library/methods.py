@@ -0,0 +1,152 @@
+import os
+import numpy as np
+
+from library.engine import prepare_hierarchy, sweep_prepared
+from library.hashing import data_digest
+from library.indices import index_function
+
+
+def method_name(method, metric):
+
+    """
+    The name used for a linkage method, including the metric unless it
+    is Euclidean.
+    """
+
+    return method if metric == 'euclidean' else '%s-%s' % (method, metric)
+
+
+def compute_linkage(X, method, metric='euclidean', cache_directory=None, digest=None):
+
+    """
+    Computes the linkage of a data matrix with fastcluster, reading it
+    from and writing it to ``cache_directory`` if given, where it is
+    keyed by the digest of the data, the method and the metric.
+
+    Parameters
+    ----------
+    X : ndarray
+        The :math:`n` by :math:`d` data matrix.
+    method : str
+        The linkage method, e.g. 'single', 'average' or 'ward'.
+    metric : str
+        The distance metric.
+    cache_directory : str, optional
+        The directory in which linkages are cached as ``.npy`` files.
+    digest : str, optional
+        The digest of ``X`` (see ``data_digest``) if already known.
+
+    Returns
+    -------
+    Z : ndarray
+        The :math:`(n-1)` by 4 linkage matrix.
+    """
+
+    path = None
+    if cache_directory is not None:
+        digest = data_digest(X) if digest is None else digest
+        path = os.path.join(cache_directory, '%s-%s-%s.npy' % (digest, method, metric))
+        if os.path.exists(path):
+            return np.load(path)
+
+    from fastcluster import linkage
+
+    Z = linkage(X, method=method, metric=metric)
+
+    if path is not None:
+        os.makedirs(cache_directory, exist_ok=True)
+        temporary = path + '.%d.tmp' % os.getpid()
+        with open(temporary, 'wb') as f:
+            np.save(f, Z)
+        os.replace(temporary, path)
+
+    return Z
+
+
+def prepare_linkage(X, method, metric='euclidean', cache_directory=None, digest=None):
+
+    """
+    Computes a linkage with ``compute_linkage`` and resolves it with
+    ``prepare_hierarchy``, so both can be done in a worker process.
+    """
+
+    return prepare_hierarchy(compute_linkage(X, method, metric, cache_directory, digest))
+
+
+def method_sweep(X, methods, metric='euclidean', indices=('ar',), cache_directory=None, executor=None):
+
+    """
+    Compares the hierarchical clusterings of a data matrix produced by
+    several linkage methods with each other.
+
+    Each linkage is computed once, read from ``cache_directory`` if it
+    has been computed before, and resolved once by
+    ``prepare_hierarchy``. Every pair is then compared with
+    ``sweep_prepared``. With an executor the linkages, and then the
+    comparisons, are computed in parallel.
+
+    Parameters
+    ----------
+    X : ndarray
+        The :math:`n` by :math:`d` data matrix.
+    methods : list
+        The linkage methods, each either a method name or a
+        ``(method, metric)`` tuple.
+    metric : str
+        The metric used for the methods given by name only.
+    indices : sequence of str
+        The indices calculated, see ``similarity_metrics.get_index``.
+    cache_directory : str, optional
+        The directory in which the linkages are cached.
+    executor : concurrent.futures.Executor, optional
+        An executor, e.g. a ``ProcessPoolExecutor``, used to compute the
+        linkages and comparisons in parallel.
+
+    Returns
+    -------
+    results : dict
+        'methods' holds the names of the :math:`M` methods and each index
+        an :math:`M` by :math:`M` by :math:`n-2` array whose element
+        ``[i, j, k]`` compares methods ``i`` and ``j`` after the ``k``'th
+        merge.
+    """
+
+    X = np.asarray(X)
+    n = len(X)
+    N = n * (n - 1) // 2
+    digest = data_digest(X) if cache_directory is not None else None
+
+    methods = [(method, metric) if isinstance(method, str) else tuple(method) for method in methods]
+    names = [method_name(method, method_metric) for method, method_metric in methods]
+
+    if len(set(names)) != len(names):
+        raise ValueError("Each linkage method must only be given once")
+
+    arguments = [(X, method, method_metric, cache_directory, digest) for method, method_metric in methods]
+    if executor is None:
+        prepared = [prepare_linkage(*argument) for argument in arguments]
+    else:
+        prepared = list(executor.map(prepare_linkage, *zip(*arguments)))
+
+    pairs = [(i, j) for i in range(len(methods)) for j in range(i + 1, len(methods))]
+    if executor is None:
+        T = [sweep_prepared(prepared[i], prepared[j]) for i, j in pairs]
+    else:
+        T = list(executor.map(sweep_prepared, [prepared[i] for i, _ in pairs], [prepared[j] for _, j in pairs]))
+
+    results = {'methods' : names}
+    for index in indices:
+
+        f = index_function(index)
+        values = np.zeros((len(methods), len(methods), n - 2))
+
+        for i, P in enumerate(prepared):
+            values[i, i] = f(P[2][:n - 2], P[2][:n - 2], P[2][:n - 2], N)
+
+        for (i, j), T_ij in zip(pairs, T):
+            P, Q = prepared[i][2][:n - 2], prepared[j][2][:n - 2]
+            values[i, j] = values[j, i] = f(T_ij, P, Q, N)
+
+        results[index] = values
+
+    return results
@@ -0,0 +1,117 @@
+import numpy as np
+
+from library.linkages import merge_sizes
+
+
+def power_sums(Z, weights=None):
+
+    """
+    Calculates the sums of the second, third and fourth powers of the
+    cluster sizes after each merge of a hierarchical clustering.
+
+    The sums are updated from the sizes :math:`a` and :math:`b` of the
+    two clusters merged in each row, the same information used to update
+    :math:`P` or :math:`Q`,
+
+    .. math::
+       \\Delta S_2 = 2ab, \\quad
+       \\Delta S_3 = 3ab(a+b), \\quad
+       \\Delta S_4 = 4ab(a^2+b^2) + 6a^2b^2
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+
+    Returns
+    -------
+    S : ndarray
+        A :math:`3` by :math:`n-2` array where ``S[p-2, k]`` is the sum
+        of the ``p``'th powers of the cluster sizes after the ``k``'th
+        merge.
+    """
+
+    n = len(Z) + 1
+    a, b = merge_sizes(Z, weights)
+    a, b = a[:n - 2], b[:n - 2]
+
+    w = np.ones(n) if weights is None else np.asarray(weights, 'double')
+    initial = np.array([np.sum(w ** 2), np.sum(w ** 3), np.sum(w ** 4)])
+
+    increments = np.array([2 * a * b,
+                           3 * a * b * (a + b),
+                           4 * a * b * (a ** 2 + b ** 2) + 6 * a ** 2 * b ** 2])
+
+    return initial[:, None] + np.cumsum(increments, axis=1)
+
+
+def expected_T(P, Q, N):
+
+    """
+    Calculates the expected value of :math:`T` when the objects are
+    randomly permuted in one of the clusterings, keeping the cluster
+    sizes fixed.
+
+    math::
+      E[T_k] = \\frac{P_k Q_k}{N}
+    """
+
+    return P * Q / N
+
+
+def variance_T(P, Q, N, W, row_sums, column_sums):
+
+    """
+    Calculates the variance of :math:`T` when the objects are randomly
+    permuted in one of the clusterings, keeping the cluster sizes fixed.
+
+    :math:`T` counts the pairs placed in the same cluster in A that are
+    also in the same cluster in B. Pairs of such pairs either coincide,
+    share one object or share none, and the probability that both are in
+    the same cluster in B depends only on which. Writing :math:`(W)_r`
+    for the falling factorial, :math:`a` and :math:`b` for the row and
+    column totals,
+
+    .. math::
+       E[T^2] = \\frac{PQ}{N}
+              + \\frac{p_3 q_3}{(W)_3}
+              + \\frac{(P^2 - P - p_3)(4Q^2 - \\sum_j b_j^2 (b_j-1)^2 + q_4)}{(W)_4}
+
+    where :math:`p_3 = \\sum_i (a_i)_3`, :math:`q_3 = \\sum_j (b_j)_3`
+    and :math:`q_4 = \\sum_j (b_j)_4`, all of which are expressed using
+    the power sums of the cluster sizes.
+
+    Parameters
+    ----------
+    P, Q : ndarray
+        The statistics :math:`P` and :math:`Q` at each level.
+    N : int
+        The total number of pairs of objects.
+    W : int
+        The total number of objects.
+    row_sums, column_sums : ndarray
+        The power sums of the cluster sizes of A and B calculated by
+        ``power_sums``.
+
+    Returns
+    -------
+    variance : ndarray
+        The variance of :math:`T` at each level.
+    """
+
+    R2, R3, R4 = row_sums
+    C2, C3, C4 = column_sums
+
+    p3 = R3 - 3 * R2 + 2 * W
+    q3 = C3 - 3 * C2 + 2 * W
+    q4 = C4 - 6 * C3 + 11 * C2 - 6 * W
+    q22 = C4 - 2 * C3 + C2
+
+    W3 = W * (W - 1) * (W - 2)
+    W4 = W3 * (W - 3)
+
+    expected_square = P * Q / N + p3 * q3 / W3 + (P ** 2 - P - p3) * (4 * Q ** 2 - q22 + q4) / W4
+    return expected_square - expected_T(P, Q, N) ** 2
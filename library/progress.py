@@ -0,0 +1,70 @@
+from concurrent.futures import CancelledError
+from time import perf_counter
+
+
+class progress_monitor():
+
+    """
+    Reports the progress of a merge loop and stops it when requested.
+
+    The merges are carried out in chunks of ``every`` merges and the
+    callback and cancellation token are only checked between chunks, so
+    the loop itself is unchanged. When neither is given all of the
+    merges are carried out in a single chunk.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        Called after each chunk as ``callback(k, elapsed, rate,
+        nonzeros)`` where ``k`` is the last merge carried out,
+        ``elapsed`` the time in seconds since the first merge, ``rate``
+        the number of merges per second and ``nonzeros`` the number of
+        non-zero elements of the matching matrix. Counting the
+        non-zero elements takes time proportional to the number of
+        clusters.
+    cancel : object, optional
+        A cancellation token with an ``is_set`` method, such as a
+        ``threading.Event``. A ``concurrent.futures.CancelledError`` is
+        raised at the end of the first chunk after it is set.
+    every : int
+        The number of merges in each chunk.
+    """
+
+    def __init__(self, callback=None, cancel=None, every=65536):
+
+        if every < 1:
+            raise ValueError("The number of merges between checks must be positive")
+
+        self.callback = callback
+        self.cancel = cancel
+        self.every = every
+        self.started = perf_counter()
+
+    def chunks(self, n):
+
+        """
+        Splits the first :math:`n-2` merges into chunks, yielding the
+        first merge of each chunk and the merge after its last.
+        """
+
+        if self.callback is None and self.cancel is None:
+            yield 0, n - 2
+            return
+
+        for start in range(0, n - 2, self.every):
+            yield start, min(start + self.every, n - 2)
+
+    def check(self, m, k):
+
+        """
+        Checks the cancellation token and calls the callback after the
+        ``k``'th merge of the matching matrix ``m``.
+        """
+
+        if self.cancel is not None and self.cancel.is_set():
+            raise CancelledError("The comparison was cancelled after %d merges" % (k + 1))
+
+        if self.callback is not None:
+            elapsed = perf_counter() - self.started
+            rate = (k + 1) / elapsed if elapsed > 0 else float('inf')
+            self.callback(k, elapsed, rate, sum(map(len, m.rows.values())))
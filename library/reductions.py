@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class reduction():
+
+    """
+    Base class for summaries of an index over the levels which are
+    updated as each level is calculated, so the index is never stored
+    for every level.
+
+    ``start`` is called with the number of levels, ``add`` with the value
+    of the index at each level in turn and ``result`` returns the
+    summary as a dictionary. The summaries are collected by
+    ``similarity_metrics`` when it is given ``reduce``.
+
+    Parameters
+    ----------
+    index : str
+        The index summarised, see ``similarity_metrics.get_index``.
+    """
+
+    name = None
+
+    def __init__(self, index='ar'):
+
+        self.index = index
+
+    def start(self, levels):
+
+        pass
+
+    def add(self, k, value):
+
+        raise NotImplementedError
+
+    def result(self):
+
+        raise NotImplementedError
+
+
+class mean(reduction):
+
+    """
+    The mean of the index over the levels, optionally weighted.
+
+    Parameters
+    ----------
+    index : str
+        The index summarised.
+    weights : ndarray, optional
+        The weight of each of the :math:`n-2` levels.
+    """
+
+    name = 'mean'
+
+    def __init__(self, index='ar', weights=None):
+
+        super().__init__(index)
+        self.weights = None if weights is None else np.asarray(weights, 'double').tolist()
+
+    def start(self, levels):
+
+        if self.weights is not None and len(self.weights) != levels:
+            raise ValueError("There must be a weight for each of the n-2 levels")
+        self.total = 0.0
+        self.weight = 0.0
+
+    def add(self, k, value):
+
+        w = 1.0 if self.weights is None else self.weights[k]
+        self.total += w * value
+        self.weight += w
+
+    def result(self):
+
+        return {'mean_' + self.index : self.total / self.weight}
+
+
+class area(reduction):
+
+    """
+    The area under the curve of the index against the level, with the
+    levels spaced evenly over :math:`[0, 1]`, using the trapezium rule.
+    """
+
+    name = 'area'
+
+    def start(self, levels):
+
+        self.levels = levels
+        self.total = 0.0
+        self.previous = None
+
+    def add(self, k, value):
+
+        if self.previous is not None:
+            self.total += (self.previous + value) / 2
+        self.previous = value
+
+    def result(self):
+
+        return {'area_' + self.index : self.total / max(self.levels - 1, 1)}
+
+
+class maximum(reduction):
+
+    """
+    The largest value of the index and the first level at which it
+    occurs.
+    """
+
+    name = 'maximum'
+    sign = 1
+
+    def start(self, levels):
+
+        self.best = None
+        self.level = None
+
+    def add(self, k, value):
+
+        if self.best is None or self.sign * value > self.sign * self.best:
+            self.best, self.level = value, k
+
+    def result(self):
+
+        prefix = 'max_' if self.sign > 0 else 'min_'
+        return {prefix + self.index : self.best, prefix + self.index + '_level' : self.level}
+
+
+class minimum(maximum):
+
+    """
+    The smallest value of the index and the first level at which it
+    occurs.
+    """
+
+    name = 'minimum'
+    sign = -1
@@ -0,0 +1,97 @@
+import heapq
+import numpy as np
+
+from library.indices import index_function
+from library.linkages import check_linkages, merge_sizes, pairs_from_sizes
+from library.sweep import merge_sweep
+
+
+def best_levels(A, B, index='ar', top=1, check_every=None, validate='numpy'):
+
+    """
+    Finds the levels at which the two hierarchical clusterings A and B
+    are most similar without calculating the index at every level.
+
+    :math:`P` and :math:`Q` are calculated exactly from the cluster
+    sizes before the merges are replayed. Since every index is
+    increasing in :math:`T`, and at level :math:`l` after level
+    :math:`j`
+
+    .. math::
+       T_j \\le T_l \\le \\min(P_l, Q_l, T_j + (P_l + Q_l) - (P_j + Q_j))
+
+    the index at each level is bounded above. The index is only
+    evaluated at levels whose bound exceeds the ``top``'th best value
+    found so far, and the sweep stops as soon as no remaining level can
+    beat it.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    index : str
+        The index to maximise, see ``similarity_metrics.get_index``.
+    top : int
+        The number of levels to find.
+    check_every : int, optional
+        The number of merges between evaluations of the bound using the
+        current value of :math:`T`, which costs :math:`O(n)`. Defaults
+        to :math:`n/16`.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Returns
+    -------
+    levels : ndarray
+        The ``top`` levels with the largest values of the index, in
+        decreasing order of the index. Level ``k`` is the clustering
+        after the ``k``'th merge, i.e. with :math:`n-k-1` clusters.
+    values : ndarray
+        The values of the index at these levels.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+    N = n * (n - 1) // 2
+    f = index_function(index)
+
+    P = pairs_from_sizes(*merge_sizes(A))[:n - 2]
+    Q = pairs_from_sizes(*merge_sizes(B))[:n - 2]
+
+    if check_every is None:
+        check_every = max(1, n // 16)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # Bound using T <= min(P, Q) only, and its maximum over the remaining levels
+        bound = np.nan_to_num(f(np.minimum(P, Q), P, Q, N), nan=-np.inf)
+        remaining = np.maximum.accumulate(bound[::-1])[::-1]
+
+        # Min-heap of the best (value, -level) found so far
+        best = []
+
+        for k, T, _, _ in merge_sweep(A, B, validate=None):
+
+            if len(best) == top and remaining[k] <= best[0][0]:
+                break
+
+            if len(best) < top or bound[k] > best[0][0]:
+                value = f(T, P[k], Q[k], N)
+                if not np.isnan(value):
+                    if len(best) < top:
+                        heapq.heappush(best, (value, -k))
+                    elif value > best[0][0]:
+                        heapq.heapreplace(best, (value, -k))
+
+            if len(best) == top and k % check_every == check_every - 1 and k < n - 3:
+                upper = np.minimum(np.minimum(P[k + 1:], Q[k + 1:]), T + P[k + 1:] + Q[k + 1:] - P[k] - Q[k])
+                if np.nanmax(f(upper, P[k + 1:], Q[k + 1:], N)) <= best[0][0]:
+                    break
+
+    best.sort(reverse=True)
+    levels = np.array([-level for _, level in best], dtype=np.int64)
+    values = np.array([value for value, _ in best])
+    return levels, values
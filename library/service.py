@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from library.hashing import pair_key
+from library.similarity import similarity_metrics
+
+
+def _TPQ(A, B):
+
+    """
+    Worker used by the service to calculate :math:`T`, :math:`P` and
+    :math:`Q` in a separate process.
+    """
+
+    metrics = similarity_metrics(A, B)
+    return metrics.T, metrics.P, metrics.Q, metrics.n
+
+
+def _load_linkage(value):
+
+    """
+    Loads a linkage given either as a nested list or as the path of a
+    ``.npy`` file.
+    """
+
+    if isinstance(value, str):
+        return np.load(value)
+
+    return np.array(value, 'double')
+
+
+class similarity_service():
+
+    """
+    Small asyncio based server which calculates similarity indices for
+    pairs of hierarchical clusterings.
+
+    Requests for the same pair of linkages (in either order) share a
+    single calculation. Concurrent identical requests are coalesced so
+    the merges are only performed once and repeated requests are served
+    from a least recently used cache of :math:`T`, :math:`P` and
+    :math:`Q`. The merges themselves are performed in an executor
+    (a process pool by default) so the event loop stays responsive.
+
+    Requests are made with ``POST /similarity`` and a JSON body of the
+    form ``{"A": ..., "B": ..., "index": ["ar", "fm"]}`` where ``A`` and
+    ``B`` are either linkage matrices or paths to ``.npy`` files
+    containing them. The response maps each index to its values.
+    ``GET /stats`` returns the cache statistics.
+
+    Parameters
+    ----------
+    cache_size : int
+        The maximum number of pairs to keep in the cache.
+    executor : concurrent.futures.Executor, optional
+        Executor used to perform the merges. A ``ProcessPoolExecutor``
+        is created when the first calculation is required if this is
+        not given.
+    """
+
+    def __init__(self, cache_size=128, executor=None):
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.pending = {}
+        self.executor = executor
+
+        # Statistics
+        self.hits = 0
+        self.coalesced = 0
+        self.computed = 0
+
+    async def metrics(self, A, B):
+
+        """
+        Calculates the similarity metrics for the linkages A and B using
+        the cache or an identical calculation already in progress where
+        possible.
+
+        Parameters
+        ----------
+        A : ndarray
+            A :math:`(n-1)` by 4 matrix encoding the linkage
+            (hierarchical clustering).
+        B : ndarray
+            A second :math:`(n-1)` by 4 matrix encoding the linkage
+            (hierarchical clustering).
+
+        Returns
+        -------
+        metrics : similarity_metrics
+            The metrics comparing A and B.
+        """
+
+        key, swapped = pair_key(A, B)
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            T, P, Q, n = self.cache[key]
+
+        elif key in self.pending:
+            self.coalesced += 1
+            T, P, Q, n = await asyncio.shield(self.pending[key])
+
+        else:
+            if swapped:
+                A, B = B, A
+
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor()
+
+            self.computed += 1
+            loop = asyncio.get_running_loop()
+            future = self.pending[key] = loop.run_in_executor(self.executor, _TPQ, A, B)
+
+            try:
+                T, P, Q, n = await asyncio.shield(future)
+            finally:
+                del self.pending[key]
+
+            self.cache[key] = (T, P, Q, n)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        # The cache stores the pair in its canonical order
+        if swapped:
+            P, Q = Q, P
+
+        return similarity_metrics.from_TPQ(T, P, Q, n)
+
+    async def respond(self, method, path, body):
+
+        """
+        Produces the status and JSON payload for a single request.
+        """
+
+        if method == 'GET' and path == '/stats':
+            return 200, {'hits': self.hits, 'coalesced': self.coalesced,
+                         'computed': self.computed, 'cached': len(self.cache)}
+
+        if method != 'POST' or path != '/similarity':
+            return 404, {'error': 'Unknown request %s %s' % (method, path)}
+
+        try:
+            request = json.loads(body)
+            A = _load_linkage(request['A'])
+            B = _load_linkage(request['B'])
+            index = request.get('index', 'ar')
+            metrics = await self.metrics(A, B)
+            output = metrics.get_index(index)
+
+        except (KeyError, TypeError, ValueError, OSError) as error:
+            return 400, {'error': str(error)}
+
+        return 200, {name: values.tolist() for name, values in output.items()}
+
+    async def handle(self, reader, writer):
+
+        """
+        Handles a single HTTP/1.1 connection.
+        """
+
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+
+        try:
+            method, path, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status, payload = await self.respond(method, path, body)
+
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            status, payload = 400, {'error': str(error)}
+
+        data = json.dumps(payload).encode()
+        writer.write(b'HTTP/1.1 %d %s\r\n' % (status, reasons[status].encode()))
+        writer.write(b'Content-Type: application/json\r\n')
+        writer.write(b'Content-Length: %d\r\n' % len(data))
+        writer.write(b'Connection: close\r\n\r\n')
+        writer.write(data)
+
+        await writer.drain()
+        writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+
+        """
+        Starts the server, listening on a unix socket if ``path`` is
+        given and on ``host`` and ``port`` otherwise.
+
+        Returns
+        -------
+        server : asyncio.Server
+            The running server.
+        """
+
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Serve similarity indices for pairs of hierarchical clusterings.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='Path of a unix socket to listen on instead of a TCP port')
+    parser.add_argument('--cache-size', type=int, default=128, help='Number of pairs to keep in the cache')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    args = parser.parse_args(argv)
+
+    async def serve():
+        service = similarity_service(args.cache_size, ProcessPoolExecutor(args.workers))
+        server = await service.start(args.host, args.port, args.unix)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
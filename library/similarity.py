@@ -1,7 +1,15 @@
 import numpy as np
 
+from library.approximate import approximate_TPQ
+from library.engine import TPQ_prepared
+from library.indices import adjusted_fowlkes_mallows, adjusted_rand, fowlkes_mallows, index_function, rand
+from library.linkages import check_linkages, cut_labels
 from library.matching_matrices.matching_matrix import matching_matrix
-from scipy.cluster.hierarchy import is_valid_linkage
+from library.matching_matrices.matching_matrix_events import matching_matrix_events
+from library.null_model import expected_T, power_sums, variance_T
+from library.progress import progress_monitor
+from library.sinks import npy_sink
+from library.subset import induced_linkage, subset_mask
 
 class similarity_metrics():
 
@@ -13,17 +21,209 @@ class similarity_metrics():
   A : ndarray
       A :math:`(n-1)` by 4 matrix encoding the linkage
       (hierarchical clustering).  See ``linkage`` documentation
-      for more information on its form.
+      for more information on its form. An integer :math:`(n-1)`
+      by 2 array of merges, such as the ``children_`` attribute of
+      scikit-learn's ``AgglomerativeClustering``, is also accepted
+      and used without conversion.
   B : A second :math:`(n-1)` by 4 matrix encoding the linkage
-    (hierarchical clustering).
+    (hierarchical clustering), or array of merges.
+  cache : TPQ_cache, optional
+      An on-disk cache (see ``library.cache``) used to retrieve the
+      statistics for a previously compared pair and to store them
+      otherwise.
+  approximate : bool
+      Whether to estimate :math:`T` from a random sample of pairs of
+      objects (see ``approximate_TPQ``) rather than calculating it
+      exactly. :math:`P` and :math:`Q` are always exact. The half-width
+      of the confidence interval of each element of ``T`` is stored in
+      ``T_error``. The approximation is also used if ``sample_size`` or
+      ``tolerance`` is given.
+  sample_size : int, optional
+      The number of pairs sampled to estimate :math:`T`.
+  tolerance : float, optional
+      The half-width of the confidence interval of the estimate of
+      :math:`T` as a fraction of the :math:`n(n-1)/2` pairs. Used to
+      choose the sample size if ``sample_size`` is not given.
+  confidence : float
+      The confidence level of ``T_error``.
+  seed : int, optional
+      Seed used to sample the pairs.
+  validate : str or None
+      How the linkages are checked, either 'numpy' (the default),
+      'scipy' to use SciPy's ``is_valid_linkage``, which imports SciPy,
+      or None to skip the checks.
+  weights : sequence of integers, optional
+      The multiplicity of each of the :math:`n` leaves, for hierarchies
+      in which identical objects have been collapsed into a single
+      leaf. The results are the same as for the hierarchies of the
+      expanded objects after the identical objects have been merged.
+  ties : str, optional
+      How merges at identical heights are treated, see ``TPQ_ties``.
+      Either 'collapse' to only keep the levels at which neither
+      hierarchy is part way through a group of tied merges, or 'align'
+      to compare the two hierarchies cut at each distinct height. The
+      statistics are calculated after every merge if this is not given.
+  out : str, optional
+      A directory to which the statistics are written in chunks as the
+      merges take place rather than being kept in memory, see
+      ``TPQ_linkages``.
+  out_indices : list, optional
+      The outputs written to ``out``, see ``npy_sink``.
+  chunk_size : int
+      The number of levels buffered in memory before writing to ``out``.
+  null_model : bool
+      Whether to calculate the power sums of the cluster sizes needed
+      for the variance of :math:`T` under random permutation, used by
+      ``variance_T``, ``z_score`` and ``adjusted_fowlkes_mallows``.
+  snapshots : sequence of int, optional
+      The merges after which the matching matrix is kept as a sparse
+      contingency table, see ``TPQ_linkages``.
+  subset : ndarray, optional
+      A boolean mask or the indices of the objects to compare. Both
+      hierarchies are restricted to these objects with
+      ``induced_linkage`` before they are compared, rather than
+      clustering the subset again.
+  accumulators : list of accumulator, optional
+      Statistics updated incrementally during the merges, see
+      ``TPQ_linkages``.
+  reduce : list of reduction, optional
+      Summaries of indices over the levels (see ``library.reductions``)
+      calculated as the merges take place, see ``TPQ_reduce``. ``T``,
+      ``P`` and ``Q`` are not stored.
+  top : int, optional
+      Only compare the hierarchies from the level with ``top`` clusters
+      upwards, see ``TPQ_top``.
+  progress : callable, optional
+      Called periodically during the merges, see ``TPQ_linkages``.
+  progress_every : int
+      The number of merges between calls to ``progress`` and checks of
+      ``cancel``.
+  cancel : object, optional
+      A cancellation token such as a ``threading.Event``, used to stop
+      the merges, see ``TPQ_linkages``.
+  prepared : bool
+      Whether to resolve the relabelling of each hierarchy in advance
+      and only accumulate :math:`T` in the merge loop, see
+      ``library.engine.TPQ_prepared``. The results are the same.
 
   '''
 
-  def __init__(self, A, B):
-    
-    self.TPQ_linkages(A, B)
-    
-  def TPQ_linkages(self, A, B):
+  def __init__(self, A, B, cache=None, approximate=False, sample_size=None,
+               tolerance=None, confidence=0.95, seed=None, validate='numpy',
+               weights=None, ties=None, out=None, out_indices=None, chunk_size=65536,
+               null_model=False, snapshots=None, subset=None, prepared=False, progress=None,
+               progress_every=65536, cancel=None, accumulators=None, reduce=None, top=None):
+
+    approximate = approximate or sample_size is not None or tolerance is not None
+
+    if cache is not None and (approximate or weights is not None or ties is not None):
+      raise ValueError("Only exact statistics for unweighted objects at every level can be cached")
+
+    if out is not None and (approximate or ties is not None or cache is not None):
+      raise ValueError("Only exact statistics at every level can be written to disk")
+
+    if approximate and (weights is not None or ties is not None):
+      raise ValueError("Approximate statistics can only be calculated for unweighted objects at every level")
+
+    if null_model and (ties is not None or out is not None):
+      raise ValueError("The null model is only available when the statistics are kept for every level")
+
+    if snapshots is not None and (approximate or ties is not None or cache is not None):
+      raise ValueError("Snapshots can only be taken when the merges are carried out at every level")
+
+    if prepared and (approximate or ties is not None or out is not None or snapshots is not None):
+      raise ValueError("The prepared hierarchies are only used to calculate the statistics in memory at every level")
+
+    if accumulators and (approximate or ties is not None or out is not None or cache is not None or prepared):
+      raise ValueError("Accumulators can only be used when the merges are carried out in memory at every level")
+
+    if reduce and (approximate or ties is not None or out is not None or cache is not None or prepared
+                   or snapshots is not None or accumulators or null_model):
+      raise ValueError("Reductions are only calculated from the exact statistics at every level")
+
+    if top is not None and (approximate or ties is not None or out is not None or cache is not None or prepared
+                            or snapshots is not None or accumulators or reduce or null_model):
+      raise ValueError("Only T, P and Q can be calculated for the top levels")
+
+    monitored = progress is not None or cancel is not None
+    if monitored and (approximate or ties is not None or prepared or top is not None):
+      raise ValueError("Progress is only reported when the merges are carried out at every level")
+
+    if subset is not None:
+      A, B, n = check_linkages(A, B, validate)
+      mask = subset_mask(subset, n)
+      A, B = induced_linkage(A, mask), induced_linkage(B, mask)
+      if weights is not None:
+        weights = np.asarray(weights)[mask]
+
+    if top is not None:
+      self.TPQ_top(A, B, top, validate, weights)
+
+    elif reduce:
+      self.TPQ_reduce(A, B, reduce, validate, weights, progress, progress_every, cancel)
+
+    elif approximate:
+      self.TPQ_approximate(A, B, sample_size, tolerance, confidence, seed, validate)
+
+    elif ties is not None:
+      self.TPQ_ties(A, B, ties, validate, weights)
+
+    elif out is not None:
+      self.TPQ_linkages(A, B, validate, weights, out, out_indices, chunk_size, snapshots,
+                        progress, progress_every, cancel)
+
+    else:
+      cached = None if cache is None else cache.get(A, B)
+
+      if cached is not None:
+        self.T, self.P, self.Q, self.n = cached
+        self.N = self.n * (self.n - 1) // 2
+
+      else:
+        if prepared:
+          A, B, self.n = check_linkages(A, B, validate)
+          W = self.n if weights is None else sum(int(w) for w in weights)
+          self.N = W * (W - 1) // 2
+          self.T, self.P, self.Q = TPQ_prepared(A, B, weights, validate=None)
+        else:
+          self.TPQ_linkages(A, B, validate, weights, snapshots=snapshots, progress=progress,
+                            progress_every=progress_every, cancel=cancel, accumulators=accumulators)
+
+        if cache is not None:
+          cache.put(A, B, self.T, self.P, self.Q)
+
+    if null_model:
+      self.power_sums(A, B, weights)
+
+  @classmethod
+  def from_TPQ(cls, T, P, Q, n, N=None):
+
+    """
+    Creates the metrics from previously calculated statistics, for
+    example ones that have been cached, without repeating the merges.
+
+    Parameters
+    ----------
+    T, P, Q : ndarray
+        The vectors calculated by ``TPQ_linkages``.
+    n : int
+        The number of objects in the hierarchical clusterings.
+    N : int, optional
+        The total number of pairs of objects, :math:`n(n-1)/2` unless
+        the objects are weighted.
+    """
+
+    metrics = cls.__new__(cls)
+    metrics.T = np.asarray(T)
+    metrics.P = np.asarray(P)
+    metrics.Q = np.asarray(Q)
+    metrics.n = n
+    metrics.N = n * (n - 1) // 2 if N is None else N
+    return metrics
+
+  def TPQ_linkages(self, A, B, validate='numpy', weights=None, out=None, out_indices=None,
+                   chunk_size=65536, snapshots=None, progress=None, progress_every=65536,
+                   cancel=None, accumulators=None):
 
     """
     Calculates statistics on two hierarchical clusterings of the same set of objects 
@@ -37,6 +237,44 @@ class similarity_metrics():
         for more information on its form.
     B : A second :math:`(n-1)` by 4 matrix encoding the linkage
         (hierarchical clustering).
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+    out : str, optional
+        A directory to which the results are written as ``.npy`` files
+        in chunks of ``chunk_size`` levels, so that only the matching
+        matrix is kept in memory. The outputs are then read-only memory
+        maps of the files, stored in ``output``, and ``T``, ``P`` and
+        ``Q`` are only set if they are written.
+    out_indices : list, optional
+        The outputs written to ``out``, any of 'T', 'P', 'Q' and the
+        indices accepted by ``get_index``. Defaults to ``['T', 'P', 'Q']``.
+    chunk_size : int
+        The number of levels buffered in memory before writing to ``out``.
+    snapshots : sequence of int, optional
+        The merges after which the matching matrix is stored as a sparse
+        contingency table with the labels of its rows and columns (see
+        ``matching_matrix.to_sparse``). They are stored in the
+        ``snapshots`` dictionary keyed by the merge, which must be less
+        than :math:`n-2`.
+    progress : callable, optional
+        Called every ``progress_every`` merges with the last merge, the
+        elapsed time, the number of merges per second and the number of
+        non-zero elements of the matching matrix, see
+        ``progress_monitor``.
+    progress_every : int
+        The number of merges between calls to ``progress`` and checks of
+        ``cancel``.
+    cancel : object, optional
+        A cancellation token such as a ``threading.Event``. A
+        ``concurrent.futures.CancelledError`` is raised within
+        ``progress_every`` merges of it being set.
+    accumulators : list of accumulator, optional
+        Statistics of the matching matrix which are updated from the
+        changes made by each merge (see ``library.accumulators``). The
+        value of each after every merge is stored in the ``statistics``
+        dictionary under its name. Not available with ``out``.
     
     Returns
     -------
@@ -57,32 +295,284 @@ class similarity_metrics():
         for the hierarchical clustering B only.
     """
  
-    # Convert to array if not already.
-    A = np.array(A, 'double')
-    B = np.array(B, 'double')
-    
-    # Performs checks
-    is_valid_linkage(A, throw=True)
-    is_valid_linkage(B, throw=True)
-    
-    n = len(A) + 1
-    n2 = len(B) + 1
-    
-    if n != n2: 
-        raise ValueError("The hierarchical clusterings must be of the same size")
+    A, B, n = check_linkages(A, B, validate)
 
-    self.T = np.zeros(n-2)
-    self.P = np.zeros(n-2)
-    self.Q = np.zeros(n-2)
     self.n = n
         
     # Creates a new matching matrix (identity of size n)
-    m = matching_matrix(n)
+    if accumulators:
+      if out is not None:
+        raise ValueError("Accumulators are not available when the statistics are written to disk")
+      m = matching_matrix_events(n, weights)
+      for accumulator in accumulators:
+        accumulator.start(m)
+      self.statistics = {accumulator.name : np.zeros(n-2) for accumulator in accumulators}
+    else:
+      m = matching_matrix(n, weights)
+
+    # Total number of pairs of objects
+    W = n if weights is None else sum(int(w) for w in weights)
+    self.N = W * (W - 1) // 2
+
+    if snapshots is not None:
+      snapshots = set(int(k) for k in snapshots)
+      if any(k < 0 or k >= n - 2 for k in snapshots):
+        raise ValueError("Snapshots can only be taken after the first n-2 merges")
+      self.snapshots = {}
+
+    monitor = progress_monitor(progress, cancel, progress_every)
+
+    if out is not None:
+
+      sink = npy_sink(out, n - 2, self.N, out_indices, chunk_size)
+
+      for start, stop in monitor.chunks(n):
+        for k, rows_A, rows_B in zip(range(start, stop), A[start:stop], B[start:stop]):
+          sink.append(m.merge(rows_A[0], rows_A[1], rows_B[0], rows_B[1], k))
+          if snapshots and k in snapshots:
+            self.snapshots[k] = m.to_sparse()
+        monitor.check(m, stop - 1)
+
+      self.output = sink.close()
+      for name in ['T', 'P', 'Q']:
+        if name in self.output:
+          setattr(self, name, self.output[name])
+      return
+
+    self.T = np.zeros(n-2)
+    self.P = np.zeros(n-2)
+    self.Q = np.zeros(n-2)
     
     # Merges the required clusters as specified by the input files 
-    for k, (rows_A, rows_B) in enumerate(zip(A, B)):
-      if k != n-2:
+    for start, stop in monitor.chunks(n):
+      for k, rows_A, rows_B in zip(range(start, stop), A[start:stop], B[start:stop]):
         self.T[k], self.P[k], self.Q[k] = m.merge(rows_A[0], rows_A[1], rows_B[0], rows_B[1], k)
+        if snapshots and k in snapshots:
+          self.snapshots[k] = m.to_sparse()
+        if accumulators:
+          for accumulator in accumulators:
+            accumulator.update(m.cells, m.row_totals, m.column_totals)
+            self.statistics[accumulator.name][k] = accumulator.value()
+          m.clear()
+      monitor.check(m, stop - 1)
+
+  def TPQ_top(self, A, B, top, validate='numpy', weights=None):
+
+    """
+    Calculates the statistics of ``TPQ_linkages`` only for the levels
+    with at most ``top`` clusters, i.e. after the last :math:`top-1`
+    merges apart from the final one.
+
+    Both hierarchies are cut at ``top`` clusters with ``cut_labels`` and
+    the matching matrix is created from the contingency table of the
+    two flat clusterings (``matching_matrix.from_labels``). Only the
+    remaining merges are then carried out, so the cost is :math:`O(n)`
+    vectorised operations plus the merges of the top levels rather
+    than :math:`n` merges.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    top : int
+        The number of clusters at the first level compared, between 2
+        and :math:`n-1`. The levels are stored in ``levels``.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    if not 2 <= top <= n - 1:
+      raise ValueError("top must be between 2 and n-1")
+
+    self.n = n
+    W = n if weights is None else sum(int(w) for w in weights)
+    self.N = W * (W - 1) // 2
+
+    # The merge after which there are top clusters
+    first = n - top - 1
+    m = matching_matrix.from_labels(n, cut_labels(A, first), cut_labels(B, first), weights)
+
+    self.levels = np.arange(first, n - 2)
+    self.T = np.zeros(top - 1)
+    self.P = np.zeros(top - 1)
+    self.Q = np.zeros(top - 1)
+    self.T[0], self.P[0], self.Q[0] = m.T, m.P, m.Q
+
+    for r, k in enumerate(range(first + 1, n - 2), 1):
+      self.T[r], self.P[r], self.Q[r] = m.merge(A[k, 0], A[k, 1], B[k, 0], B[k, 1], k)
+
+  def TPQ_reduce(self, A, B, reduce, validate='numpy', weights=None, progress=None,
+                 progress_every=65536, cancel=None):
+
+    """
+    Summarises indices over the levels as the merges take place, so
+    that only the summaries are kept rather than ``T``, ``P``, ``Q`` and
+    the indices at every level.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    reduce : list of reduction
+        The summaries, for example ``[mean('ar'), maximum('fm')]``, see
+        ``library.reductions``. The results are stored in the ``reduced``
+        dictionary.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+    progress, progress_every, cancel
+        See ``TPQ_linkages``.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    self.n = n
+    m = matching_matrix(n, weights)
+    W = n if weights is None else sum(int(w) for w in weights)
+    N = self.N = W * (W - 1) // 2
+
+    # Each index is evaluated once per level however many reductions use it
+    functions = {r.index : index_function(r.index) for r in reduce}
+    for r in reduce:
+      r.start(n - 2)
+
+    monitor = progress_monitor(progress, cancel, progress_every)
+
+    for start, stop in monitor.chunks(n):
+      for k, rows_A, rows_B in zip(range(start, stop), A[start:stop], B[start:stop]):
+        T, P, Q = m.merge(rows_A[0], rows_A[1], rows_B[0], rows_B[1], k)
+        values = {index : f(T, P, Q, N) for index, f in functions.items()}
+        for r in reduce:
+          r.add(k, values[r.index])
+      monitor.check(m, stop - 1)
+
+    self.reduced = {}
+    for r in reduce:
+      self.reduced.update(r.result())
+
+  def TPQ_ties(self, A, B, ties='collapse', validate='numpy', weights=None):
+
+    """
+    Calculates the statistics of ``TPQ_linkages`` treating each group of
+    consecutive merges at the same height as a single n-ary merge, so
+    only one record is produced per group rather than one per merge.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering). The heights in the third column are
+        required.
+    B : A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    ties : str
+        Either 'collapse' or 'align'.
+
+        With 'collapse' the hierarchies are merged in step as usual but
+        the statistics are only recorded after the ``k``'th merge if
+        the ``k``'th rows of both A and B are the last of a group of
+        merges at the same height. The rows are stored in ``levels``.
+
+        With 'align' each hierarchy is cut at every distinct height of
+        either hierarchy, i.e. after all of its merges at that height or
+        below, and the statistics are recorded for each height apart
+        from the last. The heights are stored in ``heights``.
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+    weights : sequence of integers, optional
+        The multiplicity of each of the :math:`n` leaves.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    if A.shape[1] != 4 or B.shape[1] != 4:
+      raise ValueError("The heights of the merges are required to group tied merges")
+
+    self.n = n
+    m = matching_matrix(n, weights)
+    W = n if weights is None else sum(int(w) for w in weights)
+    self.N = W * (W - 1) // 2
+
+    if ties == 'collapse':
+
+      # Rows which are the last of a group of tied merges in both hierarchies
+      last = (np.diff(A[:, 2]) != 0) & (np.diff(B[:, 2]) != 0)
+      self.levels = np.flatnonzero(last)
+
+      self.T = np.zeros(len(self.levels))
+      self.P = np.zeros(len(self.levels))
+      self.Q = np.zeros(len(self.levels))
+
+      r = 0
+      for k, (rows_A, rows_B) in enumerate(zip(A, B)):
+        if r == len(self.levels):
+          break
+        m.merge(rows_A[0], rows_A[1], rows_B[0], rows_B[1], k)
+        if k == self.levels[r]:
+          self.T[r], self.P[r], self.Q[r] = m.T, m.P, m.Q
+          r += 1
+
+    elif ties == 'align':
+
+      # The final height is excluded as both hierarchies are then a single cluster
+      self.heights = np.unique(np.concatenate([A[:, 2], B[:, 2]]))[:-1]
+
+      self.T = np.zeros(len(self.heights))
+      self.P = np.zeros(len(self.heights))
+      self.Q = np.zeros(len(self.heights))
+
+      k_A = k_B = 0
+      for r, height in enumerate(self.heights):
+        while k_A < n - 1 and A[k_A, 2] <= height:
+          m.merge_rows(A[k_A, 0], A[k_A, 1], k_A)
+          k_A += 1
+        while k_B < n - 1 and B[k_B, 2] <= height:
+          m.merge_columns(B[k_B, 0], B[k_B, 1], k_B)
+          k_B += 1
+        self.T[r], self.P[r], self.Q[r] = m.T, m.P, m.Q
+
+    else:
+      raise ValueError("ties must be either 'collapse' or 'align'")
+
+  def power_sums(self, A, B, weights=None):
+
+    """
+    Calculates the sums of the second, third and fourth powers of the
+    cluster sizes at each level of A and B (see
+    ``library.null_model.power_sums``), stored in ``row_sums`` and
+    ``column_sums``.
+    """
+
+    A, B, n = check_linkages(A, B, validate=None)
+    self.W = n if weights is None else sum(int(w) for w in weights)
+    self.row_sums = power_sums(A, weights)
+    self.column_sums = power_sums(B, weights)
+
+  def TPQ_approximate(self, A, B, sample_size=None, tolerance=None, confidence=0.95, seed=None,
+                      validate='numpy'):
+
+    """
+    Calculates the same statistics as ``TPQ_linkages`` except that
+    :math:`T` is estimated from a random sample of pairs of objects, so
+    the cost depends on the sample size rather than the merges. See
+    ``approximate_TPQ`` for the parameters.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+    self.T, self.P, self.Q, self.T_error = approximate_TPQ(A, B, sample_size, tolerance, confidence, seed)
+    self.n = n
+    self.N = n * (n - 1) // 2
     
   def get_index(self, index):
 
@@ -104,6 +594,16 @@ class similarity_metrics():
         .. math:: 
            B = \\frac{T_k}{\\sqrt{P_k Q_k}}
 
+      * index='AFM', Fowlkes and Mallows index adjusted for chance
+        .. math::
+           AB = \\frac{B_k - \\sqrt{P_k Q_k}/N}{1 - \\sqrt{P_k Q_k}/N}
+
+      * index='Z', z-score of :math:`T_k` (and so of the Rand and
+        Fowlkes and Mallows indices) under random permutation, which
+        requires ``null_model=True``
+        .. math::
+           Z = \\frac{T_k - E[T_k]}{\\sqrt{Var[T_k]}}
+
 
     With the exception of the Adjusted Rand each of the indices are defined on 
     the interval :math:`[0,1]` where values close to 1 indicate strong 
@@ -155,6 +655,12 @@ class similarity_metrics():
       
       elif index in ['b', 'fm', 'fowlkesmallows', 'fowlkes_mallows']: 
         output[index] = self.fowlkes_mallows()
+
+      elif index in ['afm', 'adjustedfowlkesmallows', 'adjusted_fowlkes_mallows']:
+        output[index] = self.adjusted_fowlkes_mallows()
+
+      elif index in ['z', 'zscore', 'z_score']:
+        output[index] = self.z_score()
       
     return output
         
@@ -167,8 +673,7 @@ class similarity_metrics():
       R_k = \\frac{n(n-1)-2(2 T_k - P_k - Q_k)}{n(n-1)}
     """
   
-    N = self.n * (self.n - 1) // 2
-    return (N - self.P - self.Q + 2 * self.T) / N 
+    return rand(self.T, self.P, self.Q, self.N)
 
   def adjusted_rand(self):
 
@@ -179,8 +684,7 @@ class similarity_metrics():
       AR = \\frac{2T_k-\\frac{P_k Q_k}{n(n-1)}}{P_k+Q_k - \\frac{P_k+Q_k}{n(n-1)}}
     """
 
-    N = self.n * (self.n - 1) // 2
-    return  2 * (N * self.T - self.P * self.Q) / (N * (self.P + self.Q) - 2 * self.P * self.Q)
+    return adjusted_rand(self.T, self.P, self.Q, self.N)
 
   def fowlkes_mallows(self):
   
@@ -190,4 +694,56 @@ class similarity_metrics():
       B = \\frac{T_k}{\\sqrt{P_k Q_k}}
     """
     
-    return self.T / np.sqrt(self.P * self.Q)
\ No newline at end of file
+    return fowlkes_mallows(self.T, self.P, self.Q, self.N)
+
+  def expected_T(self):
+
+    """
+    Calculates the expected value of :math:`T` at each level when the
+    objects are randomly permuted in one of the clusterings
+
+    math::
+      E[T_k] = \\frac{P_k Q_k}{N}
+    """
+
+    return expected_T(self.P, self.Q, self.N)
+
+  def variance_T(self):
+
+    """
+    Calculates the variance of :math:`T` at each level when the objects
+    are randomly permuted in one of the clusterings, see
+    ``library.null_model.variance_T``. Requires ``null_model=True``.
+    """
+
+    if not hasattr(self, 'row_sums'):
+      raise ValueError("The metrics must be calculated with null_model=True")
+
+    return variance_T(self.P, self.Q, self.N, self.W, self.row_sums, self.column_sums)
+
+  def z_score(self):
+
+    """
+    Calculates the number of standard deviations :math:`T` is above its
+    expected value when the objects are randomly permuted. The Rand and
+    Fowlkes and Mallows indices are linear in :math:`T` at each level so
+    this is also the z-score of both indices. Requires ``null_model=True``.
+
+    math::
+      z_k = \\frac{T_k - E[T_k]}{\\sqrt{Var[T_k]}}
+    """
+
+    return (self.T - self.expected_T()) / np.sqrt(self.variance_T())
+
+  def adjusted_fowlkes_mallows(self):
+
+    """
+    Calculates the Fowlkes and Mallows index adjusted for chance, which
+    is 0 when the index equals its expected value under random
+    permutation and 1 when the clusterings are identical
+
+    math::
+      AB_k = \\frac{B_k - E[B_k]}{1 - E[B_k]}, \\quad E[B_k] = \\frac{\\sqrt{P_k Q_k}}{N}
+    """
+
+    return adjusted_fowlkes_mallows(self.T, self.P, self.Q, self.N)
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+
+from library.indices import index_function
+
+
+class npy_sink():
+
+    """
+    Writes :math:`T`, :math:`P` and :math:`Q`, or indices calculated
+    from them, to memory-mapped ``.npy`` files as the merges take place.
+
+    Records are kept in a small in-memory buffer of ``chunk_size``
+    records which is written to the files each time it is full, so the
+    memory used does not depend on the number of levels.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which to write one ``<name>.npy`` file per
+        output. It is created if it does not exist.
+    length : int
+        The number of records that will be written.
+    N : int
+        The total number of pairs of objects, used to calculate indices.
+    names : list, optional
+        The outputs to write, any of 'T', 'P', 'Q' and the indices
+        accepted by ``similarity_metrics.get_index``. Defaults to
+        ``['T', 'P', 'Q']``.
+    chunk_size : int
+        The number of records to buffer before writing to the files.
+    """
+
+    def __init__(self, directory, length, N, names=None, chunk_size=65536):
+
+        if names is None:
+            names = ['T', 'P', 'Q']
+
+        # Check the indices before creating any files
+        self.functions = {name: None if name in ['T', 'P', 'Q'] else index_function(name) for name in names}
+
+        os.makedirs(directory, exist_ok=True)
+        self.paths = {name: os.path.join(directory, name + '.npy') for name in names}
+        self.files = {name: np.lib.format.open_memmap(path, 'w+', np.float64, (length,))
+                      for name, path in self.paths.items()}
+
+        self.N = N
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.written = 0
+
+    def append(self, TPQ):
+
+        """
+        Adds the record ``(T, P, Q)`` for the next level.
+        """
+
+        self.buffer.append(TPQ)
+        if len(self.buffer) == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+
+        """
+        Writes the buffered records to the files.
+        """
+
+        if not self.buffer:
+            return
+
+        T, P, Q = np.array(self.buffer, np.float64).T
+        columns = {'T': T, 'P': P, 'Q': Q}
+
+        start, end = self.written, self.written + len(self.buffer)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, f in self.functions.items():
+                self.files[name][start:end] = columns[name] if f is None else f(T, P, Q, self.N)
+
+        self.written = end
+        self.buffer = []
+
+    def close(self):
+
+        """
+        Writes any remaining records and closes the files.
+
+        Returns
+        -------
+        output : dict
+            A map from each output to a read-only memory map of its file.
+        """
+
+        self.flush()
+        for memmap in self.files.values():
+            memmap.flush()
+        self.files = {}
+
+        return {name: np.load(path, mmap_mode='r') for name, path in self.paths.items()}
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def subset_mask(subset, n):
+
+    """
+    Converts a boolean mask or an array of indices of the objects to keep
+    into a boolean mask of length :math:`n`.
+    """
+
+    subset = np.asarray(subset)
+
+    if subset.dtype == bool:
+        if subset.shape != (n,):
+            raise ValueError("The mask must have an element for each of the n objects")
+        return subset
+
+    mask = np.zeros(n, dtype=bool)
+    mask[subset.astype(np.int64)] = True
+    return mask
+
+
+def induced_linkage(Z, subset):
+
+    """
+    Restricts a hierarchical clustering to a subset of the objects,
+    without clustering the subset again.
+
+    Each row of Z is kept if both of the merged clusters contain kept
+    objects. Otherwise the merged cluster is the same as whichever of the
+    two contains kept objects, if either does. The kept objects are
+    relabelled :math:`0, ..., m-1` in their original order and the kept
+    rows :math:`m, ..., 2m-2`, so the result is a valid linkage of the
+    :math:`m` kept objects which can be compared with
+    ``similarity_metrics``. The heights of the kept rows are unchanged.
+
+    Parameters
+    ----------
+    Z : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering), or an array of merges.
+    subset : ndarray
+        A boolean mask of length :math:`n`, or the indices of the objects
+        to keep.
+
+    Returns
+    -------
+    Z : ndarray
+        The :math:`(m-1)` by 4 linkage, or :math:`(m-1)` by 2 array of
+        merges, of the kept objects.
+    """
+
+    n = len(Z) + 1
+    mask = subset_mask(subset, n)
+    m = int(np.count_nonzero(mask))
+
+    if m < 2:
+        raise ValueError("At least two objects must be kept")
+
+    # New label of each node, or -1 if it contains no kept objects
+    labels = np.full(2 * n - 1, -1, dtype=np.int64)
+    labels[:n][mask] = np.arange(m)
+    labels = labels.tolist()
+
+    sizes = [1] * m + [0] * (m - 1)
+    rows, kept = [], []
+
+    for k, (i, j) in enumerate(Z[:, :2].astype(np.int64).tolist()):
+
+        x, y = labels[i], labels[j]
+
+        if x >= 0 and y >= 0:
+            label = m + len(rows)
+            sizes[label] = sizes[x] + sizes[y]
+            rows.append((x, y, sizes[label]))
+            kept.append(k)
+            labels[n + k] = label
+        else:
+            labels[n + k] = max(x, y)
+
+    rows = np.array(rows, dtype=np.int64)
+
+    if Z.shape[1] == 2:
+        return rows[:, :2].astype(Z.dtype)
+
+    induced = np.empty((m - 1, 4))
+    induced[:, :2] = rows[:, :2]
+    induced[:, 2] = Z[kept, 2]
+    induced[:, 3] = rows[:, 2]
+    return induced
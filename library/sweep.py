@@ -0,0 +1,42 @@
+from library.linkages import check_linkages
+from library.matching_matrices.matching_matrix import matching_matrix
+
+
+def merge_sweep(A, B, validate='numpy'):
+
+    """
+    Merges the clusters of two hierarchical clusterings one row at a
+    time, yielding :math:`T`, :math:`P` and :math:`Q` after each merge.
+
+    This is the same calculation as ``similarity_metrics.TPQ_linkages``
+    except that the statistics are produced as they are calculated, so
+    callers can stop early or fold them into summaries without storing
+    the full vectors.
+
+    Parameters
+    ----------
+    A : ndarray
+        A :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    B : ndarray
+        A second :math:`(n-1)` by 4 matrix encoding the linkage
+        (hierarchical clustering).
+    validate : str or None
+        How the linkages are checked, see ``check_linkages``.
+
+    Yields
+    ------
+    k : int
+        The row of A and B that has just been merged, from 0 to
+        :math:`n-3`.
+    T, P, Q : int
+        The statistics after the ``k``'th merge.
+    """
+
+    A, B, n = check_linkages(A, B, validate)
+
+    m = matching_matrix(n)
+
+    for k, (rows_A, rows_B) in enumerate(zip(A[:n - 2], B[:n - 2])):
+        T, P, Q = m.merge(rows_A[0], rows_A[1], rows_B[0], rows_B[1], k)
+        yield k, T, P, Q
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_equal
+from fastcluster import linkage
+from scipy.cluster.hierarchy import fcluster
+from sklearn.metrics import mutual_info_score
+from sklearn.metrics.cluster import contingency_matrix
+from library.accumulators import accumulator, max_overlap, mutual_information, sum_of_squares
+from library.similarity import similarity_metrics
+
+class cell_count(accumulator):
+
+  # Counts the elements combined by each merge
+  name = 'cells'
+
+  def start(self, m):
+    self.count = 0
+
+  def update(self, cells, row_totals, column_totals):
+    self.count = len(cells)
+
+  def value(self):
+    return self.count
+
+class TestAccumulators(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 13)
+    x = np.random.normal(0, 1, (60, 2))
+    self.A = linkage(x, 'average')
+    self.B = linkage(x, 'complete')
+
+    # Contingency tables at each level
+    self.tables = [contingency_matrix(fcluster(self.A, 59 - k, 'maxclust'), fcluster(self.B, 59 - k, 'maxclust'))
+                   for k in range(58)]
+
+  def test_accumulators(self):
+
+    # Act
+    accumulators = [sum_of_squares(), max_overlap(), mutual_information(), cell_count()]
+    metrics = similarity_metrics(self.A, self.B, accumulators=accumulators)
+
+    # Assert
+    assert_equal(similarity_metrics(self.A, self.B).T, metrics.T)
+    assert_equal([np.sum(C ** 2) for C in self.tables], metrics.statistics['sum_of_squares'])
+    assert_equal([np.max(C) for C in self.tables], metrics.statistics['max_overlap'])
+    assert_almost_equal([mutual_info_score(None, None, contingency=C) for C in self.tables],
+                        metrics.statistics['mutual_information'])
+
+    # The sum of squares of the row totals after the last merge is the same as from P
+    self.assertEqual(2 * metrics.P[-1] + 60, accumulators[0].rows)
+    self.assertTrue(np.all(metrics.statistics['cells'] >= 0))
+
+  def test_weighted(self):
+
+    weights = np.arange(60) % 3 + 1
+    metrics = similarity_metrics(self.A, self.B, weights=weights, accumulators=[sum_of_squares()])
+    assert_equal(2 * metrics.T + np.sum(weights), metrics.statistics['sum_of_squares'])
+
+  def test_unsupported(self):
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.A, self.B, ties='align', accumulators=[max_overlap()])
+
+if __name__ == '__main__':
+  unittest.main()
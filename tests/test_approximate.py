@@ -0,0 +1,104 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_equal
+from fastcluster import linkage
+from scipy.cluster.hierarchy import cophenet
+from scipy.spatial.distance import squareform
+from library.linkages import leaf_order, merge_sizes
+from library.approximate import pair_merge_steps, sample_size_for_tolerance, tolerance_for_sample_size
+from library.similarity import similarity_metrics
+
+class TestApproximate(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 1234)
+    x = np.random.normal(0, 1, (300, 2))
+    self.A = linkage(x, 'average')
+    self.B = linkage(x, 'ward')
+
+  def test_pair_merge_steps(self):
+
+    # Arrange, the cophenetic distance of a linkage whose heights are
+    # the row indices is the row in which each pair is merged
+    Z = self.A.copy()
+    Z[:, 2] = np.arange(len(Z))
+    expected = squareform(cophenet(Z))
+
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 300, 1000)
+    y = (x + rng.integers(1, 300, 1000)) % 300
+
+    # Act
+    steps = pair_merge_steps(self.A, x, y)
+
+    # Assert
+    assert_equal(expected[x, y], steps)
+
+  def test_leaf_order(self):
+
+    # Arrange
+    Z = self.A
+    merges = Z[:, :2].astype(np.int64)
+    weights = np.arange(300) % 4 + 1
+
+    # Act
+    start, sizes = leaf_order(merges)
+
+    # Assert, the sizes match the linkage and the two clusters of each merge are adjacent
+    assert_equal(np.concatenate([np.ones(300), Z[:, 3]]), sizes)
+    assert_equal(start[merges[:, 0]] + sizes[merges[:, 0]], start[merges[:, 1]])
+    assert_equal(start[merges[:, 0]], start[300:])
+    assert_equal(np.sort(start[:300]), np.arange(300))
+
+    sizes_1, sizes_2 = merge_sizes(merges, weights)
+    assert_equal(sizes_1 + sizes_2, [np.sum(weights[m]) for m in self.members(Z)])
+
+  def members(self, Z):
+
+    n = len(Z) + 1
+    members = [[i] for i in range(n)]
+    for i, j in Z[:, :2].astype(np.int64).tolist():
+      members.append(members[i] + members[j])
+    return members[n:]
+
+  def test_pair_merge_steps_of_a_chain(self):
+
+    # Arrange, each object is merged with the cluster of all the objects before it
+    n = 500
+    merges = np.column_stack([np.r_[0, np.arange(n, 2 * n - 2)], np.arange(1, n)])
+    x = np.arange(n - 1)
+    y = np.arange(1, n)[::-1]
+
+    # Act
+    steps = pair_merge_steps(merges, x, y)
+
+    # Assert
+    assert_equal(np.maximum(x, y) - 1, steps)
+
+  def test_sample_size_and_tolerance(self):
+
+    m = sample_size_for_tolerance(0.01, 0.95)
+    self.assertEqual(18445, m)
+    self.assertLessEqual(tolerance_for_sample_size(m, 0.95), 0.01)
+
+  def test_estimate_within_error(self):
+
+    # Act
+    exact = similarity_metrics(self.A, self.B)
+    approximate = similarity_metrics(self.A, self.B, tolerance=0.01, seed=0)
+
+    # Assert
+    assert_equal(exact.P, approximate.P)
+    assert_equal(exact.Q, approximate.Q)
+    self.assertAlmostEqual(0.01 * 300 * 299 / 2, approximate.T_error, delta=1)
+    self.assertTrue(np.all(np.abs(exact.T - approximate.T) <= approximate.T_error))
+    self.assertTrue(np.all(approximate.T <= np.minimum(exact.P, exact.Q)))
+
+  def test_approximate_can_not_be_cached(self):
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.A, self.B, cache=object(), sample_size=100)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+from library.batch import common_prefix, compare_many, merge_keys
+from library.similarity import similarity_metrics
+
+def random_merges(n, prefix, rng):
+
+  # Completes a prefix of merges by merging random pairs of clusters
+  merges = [list(row) for row in prefix]
+  active = set(range(n))
+  for k, (i, j) in enumerate(merges):
+    active -= {i, j}
+    active.add(n + k)
+
+  active = sorted(active)
+  while len(active) > 1:
+    i, j = rng.choice(len(active), 2, replace=False)
+    merged = (active[i], active[j])
+    active = [c for c in active if c not in merged] + [n + len(merges)]
+    merges.append(list(merged))
+
+  return np.array(merges)
+
+class TestBatch(unittest.TestCase):
+
+  def setUp(self):
+
+    rng = np.random.default_rng(42)
+    self.n = 200
+    self.A = random_merges(self.n, [], rng)
+    base = random_merges(self.n, [], rng)
+
+    # Hierarchies sharing prefixes of different lengths, including a duplicate and one sharing nothing
+    self.Bs = [random_merges(self.n, base[:length], rng) for length in [150, 120, 180, 150, 0]]
+    self.Bs.append(self.Bs[2].copy())
+    self.Bs.append(base)
+
+  def test_merge_keys(self):
+
+    Z = np.array([[3., 1., 0.1, 2.], [0., 4., 0.2, 3.]])
+    assert_array_equal([[1, 3], [0, 4]], merge_keys(Z))
+    self.assertEqual(1, common_prefix(merge_keys(Z), np.array([[1, 3], [2, 4]])))
+
+  def test_compare_many(self):
+
+    # Act
+    metrics = compare_many(self.A, self.Bs)
+
+    # Assert
+    self.assertEqual(len(self.Bs), len(metrics))
+    for B, result in zip(self.Bs, metrics):
+      expected = similarity_metrics(self.A, B)
+      assert_array_equal(expected.T, result.T)
+      assert_array_equal(expected.P, result.P)
+      assert_array_equal(expected.Q, result.Q)
+      self.assertEqual(expected.N, result.N)
+
+  def test_compare_many_weighted(self):
+
+    weights = np.arange(self.n) % 3 + 1
+    metrics = compare_many(self.A, self.Bs[:3], weights=weights)
+
+    for B, result in zip(self.Bs, metrics):
+      expected = similarity_metrics(self.A, B, weights=weights)
+      assert_array_equal(expected.T, result.T)
+      self.assertEqual(expected.N, result.N)
+
+  def test_different_sizes(self):
+
+    with self.assertRaises(ValueError):
+      compare_many(self.A, [self.A[:-1]])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from numpy.testing import assert_equal
+from library.cache import TPQ_cache
+from library.hashing import pair_key
+from library.similarity import similarity_metrics
+
+class TestTPQCache(unittest.TestCase):
+
+  def setUp(self):
+
+    self.A = np.array(
+      [[ 0. , 2., 0.11, 2. ],
+       [ 1. , 4., 0.23, 3. ],
+       [ 3. , 5., 0.24, 4. ]])
+
+    self.B = np.array(
+      [[ 0. , 2., 0.11, 2. ],
+       [ 3. , 4., 0.25, 3. ],
+       [ 1. , 5., 0.27, 4. ]])
+
+    self.directory = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def assert_same_metrics(self, expected, actual):
+    assert_equal(expected.T, actual.T)
+    assert_equal(expected.P, actual.P)
+    assert_equal(expected.Q, actual.Q)
+    self.assertEqual(expected.n, actual.n)
+
+  def test_miss_then_hit(self):
+
+    # Arrange
+    cache = TPQ_cache(self.directory.name)
+
+    # Act
+    self.assertIsNone(cache.get(self.A, self.B))
+    first = similarity_metrics(self.A, self.B, cache=cache)
+    second = similarity_metrics(self.A, self.B, cache=cache)
+
+    # Assert
+    self.assertEqual(1, len(os.listdir(self.directory.name)))
+    self.assert_same_metrics(similarity_metrics(self.A, self.B), first)
+    self.assert_same_metrics(first, second)
+
+  def test_swapped_pair_shares_entry(self):
+
+    # Arrange
+    cache = TPQ_cache(self.directory.name, compressed=False)
+    similarity_metrics(self.A, self.B, cache=cache)
+
+    # Act
+    T, P, Q, n = cache.get(self.B, self.A)
+
+    # Assert
+    expected = similarity_metrics(self.B, self.A)
+    self.assertIsInstance(T, np.memmap)
+    assert_equal(expected.T, T)
+    assert_equal(expected.P, P)
+    assert_equal(expected.Q, Q)
+    self.assertEqual(4, n)
+
+  def test_eviction_removes_least_recently_used(self):
+
+    # Arrange
+    cache = TPQ_cache(self.directory.name, compressed=False)
+    cache.put(self.A, self.A, *cache_entry(self.A, self.A))
+    size = sum(entry.stat().st_size for entry in os.scandir(self.directory.name))
+    cache.max_bytes = 2 * size
+
+    # the entry for (A, A) is older than the entry for (B, B)
+    cache.put(self.B, self.B, *cache_entry(self.B, self.B))
+    os.utime(cache.path(cache_key(self.A, self.A)), (0, 0))
+
+    # Act
+    cache.put(self.A, self.B, *cache_entry(self.A, self.B))
+
+    # Assert
+    self.assertIsNone(cache.get(self.A, self.A))
+    self.assertIsNotNone(cache.get(self.B, self.B))
+    self.assertIsNotNone(cache.get(self.A, self.B))
+
+def cache_entry(A, B):
+  metrics = similarity_metrics(A, B)
+  return metrics.T, metrics.P, metrics.Q
+
+def cache_key(A, B):
+  return pair_key(A, B)[0]
+
+if __name__ == '__main__':
+  unittest.main()
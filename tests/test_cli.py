@@ -0,0 +1,99 @@
+import csv
+import os
+import tempfile
+import unittest
+import numpy as np
+from numpy.testing import assert_equal
+from library.cli import main, plan_comparisons
+from library.similarity import similarity_metrics
+
+class TestCommandLine(unittest.TestCase):
+
+  def setUp(self):
+
+    self.linkages = {
+      'a': np.array(
+        [[ 0. , 2., 0.11, 2. ],
+         [ 1. , 4., 0.23, 3. ],
+         [ 3. , 5., 0.24, 4. ]]),
+      'b': np.array(
+        [[ 0. , 2., 0.11, 2. ],
+         [ 3. , 4., 0.25, 3. ],
+         [ 1. , 5., 0.27, 4. ]]),
+      'c': np.array(
+        [[ 0. , 1., 0.10, 2. ],
+         [ 2. , 3., 0.20, 2. ],
+         [ 4. , 5., 0.30, 4. ]])}
+
+    self.directory = tempfile.TemporaryDirectory()
+    for name, Z in self.linkages.items():
+      np.save(os.path.join(self.directory.name, name + '.npy'), Z)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_plans(self):
+
+    names = ['a', 'b', 'c']
+    self.assertEqual([('a', 'b'), ('a', 'c'), ('b', 'c')], plan_comparisons(names, 'all-pairs'))
+    self.assertEqual([('b', 'a'), ('b', 'c')], plan_comparisons(names, 'one-vs-many', reference='b'))
+
+    pairs = os.path.join(self.directory.name, 'pairs.txt')
+    with open(pairs, 'w') as f:
+      f.write('c a\n')
+    self.assertEqual([('c', 'a')], plan_comparisons(names, 'pairs', pairs=pairs))
+
+    with self.assertRaises(ValueError):
+      plan_comparisons(names, 'one-vs-many', reference='d')
+
+  def test_all_pairs_to_npz(self):
+
+    # Act
+    output = os.path.join(self.directory.name, 'out.npz')
+    main(['--directory', self.directory.name, '--output', output, '--index', 'ar', 'fm', '--workers', '2', '--quiet'])
+
+    # Assert
+    with np.load(output) as results:
+      self.assertEqual(6, len(results.files))
+      metrics = similarity_metrics(self.linkages['a'], self.linkages['c'])
+      assert_equal(metrics.adjusted_rand(), results['a/c/ar'])
+      assert_equal(metrics.fowlkes_mallows(), results['a/c/fm'])
+
+  def test_one_vs_many_to_csv(self):
+
+    # Act
+    output = os.path.join(self.directory.name, 'out.csv')
+    main(['--directory', self.directory.name, '--output', output, '--plan', 'one-vs-many',
+          '--reference', 'a', '--workers', '1', '--quiet'])
+
+    # Assert
+    with open(output) as f:
+      rows = list(csv.DictReader(f))
+
+    self.assertEqual(4, len(rows))
+    metrics = similarity_metrics(self.linkages['a'], self.linkages['b'])
+    ar = [float(row['ar']) for row in rows if row['b'] == 'b']
+    assert_equal(metrics.adjusted_rand(), ar)
+    self.assertEqual(['3', '2'], [row['clusters'] for row in rows if row['b'] == 'b'])
+
+  def test_index_names(self):
+
+    # Act, the names are normalised and repeated indices removed
+    output = os.path.join(self.directory.name, 'out.csv')
+    main(['--directory', self.directory.name, '--output', output, '--index', 'AR', 'fm', 'adjusted_rand',
+          '--workers', '1', '--quiet'])
+
+    # Assert
+    with open(output) as f:
+      rows = list(csv.DictReader(f))
+
+    self.assertEqual(['a', 'b', 'level', 'clusters', 'ar', 'fm'], list(rows[0]))
+    metrics = similarity_metrics(self.linkages['a'], self.linkages['b'])
+    fm = [float(row['fm']) for row in rows if row['a'] == 'a' and row['b'] == 'b']
+    assert_equal(metrics.fowlkes_mallows(), fm)
+
+    with self.assertRaises(SystemExit):
+      main(['--directory', self.directory.name, '--output', output, '--index', 'ar', 'bogus', '--quiet'])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from numpy.testing import assert_almost_equal
+from fastcluster import linkage
+from library.consensus import medoid
+from library.similarity import similarity_metrics
+
+class TestConsensus(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 11)
+    x = np.random.normal(0, 1, (120, 3))
+    x[:40] += 3
+    methods = ['single', 'complete', 'average', 'weighted', 'ward', 'centroid', 'median']
+    self.linkages = [linkage(x, method) for method in methods]
+
+    # Mean adjusted Rand over the levels and the other hierarchies
+    K = len(self.linkages)
+    self.expected = np.zeros(K)
+    for i in range(K):
+      for j in range(K):
+        if i != j:
+          self.expected[i] += np.mean(similarity_metrics(self.linkages[i], self.linkages[j]).adjusted_rand()) / (K - 1)
+
+  def test_medoid(self):
+
+    # Act
+    best, scores = medoid(self.linkages, check_every=10)
+
+    # Assert
+    self.assertEqual(np.argmax(self.expected), best)
+    kept = ~np.isnan(scores)
+    assert_almost_equal(self.expected[kept], scores[kept])
+    self.assertTrue(np.all(self.expected[~kept] < self.expected[best]))
+
+  def test_medoid_executor(self):
+
+    with ProcessPoolExecutor(2) as executor:
+      best, scores = medoid(self.linkages, check_every=25, executor=executor)
+
+    self.assertEqual(np.argmax(self.expected), best)
+    assert_almost_equal(self.expected[best], scores[best])
+
+if __name__ == '__main__':
+  unittest.main()
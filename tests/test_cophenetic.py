@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from fastcluster import linkage
+from scipy.cluster.hierarchy import cophenet
+from scipy.stats import spearmanr
+from library.cophenetic import baker_gamma, cophenetic_correlation, cophenetic_sums, cross_products, cross_products_paths
+
+class TestCophenetic(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 42)
+    x = np.random.normal(0, 1, (150, 3))
+    self.A = linkage(x, 'average')
+    self.B = linkage(x, 'single')
+    self.C = linkage(np.round(x), 'complete')
+
+  def test_sums(self):
+
+    c_A, c_B = cophenet(self.A), cophenet(self.B)
+    sums = cophenetic_sums(self.A, self.B)
+
+    self.assertEqual(len(c_A), sums['N'])
+    self.assertAlmostEqual(np.sum(c_A), sums['A'])
+    self.assertAlmostEqual(np.sum(c_B), sums['B'])
+    self.assertAlmostEqual(np.sum(c_A ** 2), sums['AA'])
+    self.assertAlmostEqual(np.sum(c_B ** 2), sums['BB'])
+    self.assertAlmostEqual(np.sum(c_A * c_B), sums['AB'])
+
+  def test_cross_products_paths(self):
+
+    for A, B in [(self.A, self.B), (self.B, self.C), (self.C, self.A)]:
+      expected = np.sum(cophenet(A) * cophenet(B))
+      self.assertAlmostEqual(expected, cross_products(A, B, A[:, 2], B[:, 2]))
+      self.assertAlmostEqual(expected, cross_products_paths(A, B, A[:, 2], B[:, 2]))
+
+  def test_chains(self):
+
+    # Arrange, each object is merged with the cluster of all the objects before it, in random orders
+    n = 2000
+    rng = np.random.default_rng(0)
+    chains = []
+    for order in [rng.permutation(n), rng.permutation(n)]:
+      Z = np.zeros((n - 1, 4))
+      Z[:, 0] = np.r_[order[0], np.arange(n, 2 * n - 2)]
+      Z[:, 1] = order[1:]
+      Z[:, 2] = rng.random(n - 1).cumsum()
+      Z[:, 3] = np.arange(2, n + 1)
+      chains.append(Z)
+
+    # Act
+    sums = cophenetic_sums(*chains)
+
+    # Assert
+    self.assertAlmostEqual(1, np.sum(cophenet(chains[0]) * cophenet(chains[1])) / sums['AB'])
+
+  def test_cophenetic_correlation(self):
+
+    for A, B in [(self.A, self.B), (self.B, self.A), (self.A, self.C)]:
+      expected = np.corrcoef(cophenet(A), cophenet(B))[0, 1]
+      self.assertAlmostEqual(expected, cophenetic_correlation(A, B))
+
+  def test_baker_gamma(self):
+
+    for A, B in [(self.A, self.B), (self.A, self.C)]:
+
+      # The row in which each pair is merged
+      steps_A, steps_B = A.copy(), B.copy()
+      steps_A[:, 2] = np.arange(len(A))
+      steps_B[:, 2] = np.arange(len(B))
+
+      expected = spearmanr(cophenet(steps_A), cophenet(steps_B))[0]
+      self.assertAlmostEqual(expected, baker_gamma(A, B))
+      self.assertAlmostEqual(expected, baker_gamma(A[:, :2].astype(int), B[:, :2].astype(int)))
+
+if __name__ == '__main__':
+  unittest.main()
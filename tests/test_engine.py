@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from numpy.testing import assert_equal
+from fastcluster import linkage
+from library.engine import TPQ_prepared, prepare_hierarchy
+from library.matching_matrices.matching_matrix import matching_matrix
+from library.similarity import similarity_metrics
+
+class TestEngine(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 5)
+    x = np.random.normal(0, 1, (300, 2))
+    self.A = linkage(x, 'single')
+    self.B = linkage(x, 'average')
+
+  def test_prepare_hierarchy(self):
+
+    # Arrange, the labels merged by the matching matrix
+    m = matching_matrix(len(self.A) + 1)
+    expected = []
+    for k, (i, j) in enumerate(self.A[:, :2].astype(int)):
+      i, j = m.relabel_A(i, j, k)
+      m.update_row_totals_and_P(i, j)
+      m.update_row_dictionary_and_T(i, j)
+      expected.append((i, j))
+
+    # Act
+    source, target, pairs = prepare_hierarchy(self.A)
+
+    # Assert
+    assert_equal(expected, np.column_stack([source, target]))
+
+  def test_TPQ_prepared(self):
+
+    weights = np.arange(300) % 4 + 1
+
+    for w in [None, weights]:
+
+      # Act
+      expected = similarity_metrics(self.A, self.B, weights=w)
+      with ThreadPoolExecutor(2) as executor:
+        T, P, Q = TPQ_prepared(self.A, self.B, w, executor)
+
+      # Assert
+      assert_equal(expected.T, T)
+      assert_equal(expected.P, P)
+      assert_equal(expected.Q, Q)
+
+      metrics = similarity_metrics(self.A, self.B, weights=w, prepared=True)
+      assert_equal(expected.T, metrics.T)
+      self.assertEqual(expected.N, metrics.N)
+
+if __name__ == '__main__':
+  unittest.main()
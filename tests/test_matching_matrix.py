@@ -26,6 +26,43 @@ class TestMatchingMatrix(unittest.TestCase):
     self.assertDictEqual({}, m.update_A)
     self.assertDictEqual({}, m.update_B)
   
+  def test_init_weighted(self):
+
+    # Arrange / Act
+    m = matching_matrix(3, weights=[1, 3, 2])
+
+    # Assert
+    self.assertDictEqual({ 0 : {0:1}, 1 : {1:3}, 2 : {2:2} }, m.rows)
+    self.assertDictEqual({ 0 : {0:1}, 1 : {1:3}, 2 : {2:2} }, m.columns)
+    self.assertDictEqual({0:1, 1:3, 2:2}, m.rtot)
+    self.assertDictEqual({0:1, 1:3, 2:2}, m.ctot)
+
+    # 3 pairs within object 1 and 1 pair within object 2
+    self.assertEqual(4, m.T)
+    self.assertEqual(4, m.P)
+    self.assertEqual(4, m.Q)
+
+    m.merge(0, 1, 0, 2, 0)
+    self.assertEqual(4, m.T)
+    self.assertEqual(7, m.P)
+    self.assertEqual(6, m.Q)
+
+  def test_copy(self):
+
+    # Arrange
+    m = matching_matrix(4)
+    m.merge(0, 1, 0, 2, 0)
+
+    # Act
+    c = m.copy()
+    c.merge(2, 3, 1, 3, 1)
+
+    # Assert, the original is unchanged
+    self.assertDictEqual({ 1 : {1:1, 2:1}, 2 : {2:1}, 3:{3:1} }, m.rows)
+    self.assertDictEqual({4:1}, m.update_A)
+    self.assertEqual((0, 1, 1), (m.T, m.P, m.Q))
+    self.assertEqual((m.T, m.P + 1, m.Q + 1), (c.T, c.P, c.Q))
+
   def test_relabel_A_clusters_each_with_one_point(self):
   
     # set-up
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from numpy.testing import assert_almost_equal
+from fastcluster import linkage
+from library.hashing import data_digest
+from library.methods import compute_linkage, method_sweep
+from library.similarity import similarity_metrics
+
+class TestMethods(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 19)
+    self.x = np.random.normal(0, 1, (70, 2))
+    self.methods = ['single', 'average', 'ward', ('complete', 'cityblock')]
+
+  def test_method_sweep(self):
+
+    # Act
+    results = method_sweep(self.x, self.methods, indices=['ar', 'fm'])
+
+    # Assert
+    self.assertEqual(['single', 'average', 'ward', 'complete-cityblock'], results['methods'])
+    self.assertEqual((4, 4, 68), results['ar'].shape)
+
+    A = linkage(self.x, 'average')
+    B = linkage(self.x, 'complete', 'cityblock')
+    metrics = similarity_metrics(A, B)
+    assert_almost_equal(metrics.adjusted_rand(), results['ar'][1, 3])
+    assert_almost_equal(metrics.fowlkes_mallows(), results['fm'][3, 1])
+    assert_almost_equal(np.ones(68), results['ar'][2, 2])
+
+  def test_cache_and_executor(self):
+
+    with tempfile.TemporaryDirectory() as directory:
+
+      # Act
+      with ProcessPoolExecutor(2) as executor:
+        results = method_sweep(self.x, self.methods[:3], cache_directory=directory, executor=executor)
+
+      # Assert, the cached linkages are used for later sweeps
+      path = os.path.join(directory, '%s-ward-euclidean.npy' % data_digest(self.x))
+      self.assertTrue(os.path.exists(path))
+      self.assertEqual(3, len(os.listdir(directory)))
+
+      cached = compute_linkage(self.x, 'ward', cache_directory=directory)
+      assert_almost_equal(linkage(self.x, 'ward'), cached)
+      assert_almost_equal(results['ar'], method_sweep(self.x, self.methods[:3], cache_directory=directory)['ar'])
+
+if __name__ == '__main__':
+  unittest.main()
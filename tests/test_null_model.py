@@ -0,0 +1,88 @@
+import itertools
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal
+from scipy.cluster.hierarchy import fcluster
+from library.null_model import power_sums
+from library.similarity import similarity_metrics
+
+class TestNullModel(unittest.TestCase):
+
+  def setUp(self):
+
+    self.A = np.array(
+      [[ 0. , 1., 0.1, 2. ],
+       [ 2. , 3., 0.2, 2. ],
+       [ 4. , 7., 0.3, 3. ],
+       [ 5. , 6., 0.4, 2. ],
+       [ 8. , 9., 0.5, 5. ],
+       [10. , 11., 0.6, 7. ]])
+
+    self.B = np.array(
+      [[ 0. , 4., 0.1, 2. ],
+       [ 1. , 5., 0.2, 2. ],
+       [ 2. , 7., 0.3, 3. ],
+       [ 3. , 6., 0.4, 2. ],
+       [ 8. , 10., 0.5, 4. ],
+       [ 9. , 11., 0.6, 7. ]])
+
+  def test_power_sums(self):
+
+    # After each merge of A the cluster sizes are
+    sizes = [[2, 1, 1, 1, 1, 1], [2, 2, 1, 1, 1], [3, 2, 1, 1], [3, 2, 2], [5, 2]]
+    expected = [[sum(s ** p for s in level) for level in sizes] for p in [2, 3, 4]]
+
+    assert_almost_equal(expected, power_sums(self.A))
+
+  def test_moments_match_permutations(self):
+
+    # Arrange, T for every permutation of the objects in B at every level
+    n = 7
+    metrics = similarity_metrics(self.A, self.B, null_model=True)
+    T = []
+
+    for k in range(n - 2):
+      labels_A = fcluster(self.A, n - k - 1, 'maxclust')
+      labels_B = fcluster(self.B, n - k - 1, 'maxclust')
+      T_k = []
+      for permutation in itertools.permutations(range(n)):
+        C = np.bincount(labels_A * n + labels_B[list(permutation)])
+        T_k.append(np.sum(C * (C - 1) // 2))
+      T.append(T_k)
+
+    T = np.array(T, 'double')
+
+    # Assert
+    assert_almost_equal(T.mean(axis=1), metrics.expected_T())
+    assert_almost_equal(T.var(axis=1), metrics.variance_T())
+    assert_almost_equal((metrics.T - T.mean(axis=1)) / T.std(axis=1), metrics.z_score())
+
+  def test_weighted_moments(self):
+
+    # Arrange, identical objects collapsed with weights give the same null model
+    weights = [1, 2, 1, 1, 3, 1, 1]
+    metrics = similarity_metrics(self.A, self.B, weights=weights, null_model=True)
+
+    # Act
+    W = sum(weights)
+    expected = metrics.P * metrics.Q / (W * (W - 1) // 2)
+
+    # Assert
+    assert_almost_equal(expected, metrics.expected_T())
+    self.assertTrue(np.all(metrics.variance_T() >= 0))
+
+  def test_adjusted_fowlkes_mallows(self):
+
+    metrics = similarity_metrics(self.A, self.A)
+    assert_almost_equal(np.ones(5), metrics.adjusted_fowlkes_mallows())
+
+    metrics = similarity_metrics(self.A, self.B)
+    expected = np.sqrt(metrics.P * metrics.Q) / metrics.N
+    fm = metrics.fowlkes_mallows()
+    assert_almost_equal((fm - expected) / (1 - expected), metrics.get_index('afm')['afm'])
+
+    with self.assertRaises(ValueError):
+      metrics.z_score()
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 import numpy as np
 from numpy.testing import assert_almost_equal
@@ -86,5 +88,31 @@ class Performance(unittest.TestCase):
     print("\nSklearn average time: ", np.average(sklearn_times))
     print("\nFCluster average time: ", np.average(fcluster_times))
     
+class ImportTime(unittest.TestCase):
+
+  def import_times(self, module):
+
+    # -X importtime reports the cumulative import time of every module in microseconds
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+      if line.startswith('import time:') and '|' in line:
+        _, cumulative, name = line.split('|')
+        if cumulative.strip().isdigit():
+          times[name.strip()] = int(cumulative)
+    return times
+
+  def test_core_imports_without_scipy(self):
+
+    for module in ['library.similarity', 'library.matching_matrices']:
+      times = self.import_times(module)
+
+      self.assertNotIn('scipy', times)
+      self.assertNotIn('scipy.cluster.hierarchy', times)
+
+      # The library itself, excluding NumPy, should take a few milliseconds to import
+      self.assertLess(times[module] - times.get('numpy', 0), 100000)
+
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
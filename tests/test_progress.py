@@ -0,0 +1,55 @@
+import threading
+import unittest
+import numpy as np
+from concurrent.futures import CancelledError
+from numpy.testing import assert_equal
+from fastcluster import linkage
+from library.similarity import similarity_metrics
+
+class TestProgress(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 9)
+    x = np.random.normal(0, 1, (100, 2))
+    self.A = linkage(x, 'complete')
+    self.B = linkage(x, 'ward')
+
+  def test_progress(self):
+
+    # Arrange
+    calls = []
+    callback = lambda k, elapsed, rate, nonzeros: calls.append((k, elapsed, rate, nonzeros))
+
+    # Act
+    metrics = similarity_metrics(self.A, self.B, progress=callback, progress_every=30)
+
+    # Assert
+    assert_equal(similarity_metrics(self.A, self.B).T, metrics.T)
+    self.assertEqual([29, 59, 89, 97], [k for k, _, _, _ in calls])
+    self.assertTrue(all(elapsed >= 0 and rate > 0 for _, elapsed, rate, _ in calls))
+
+    # The last matching matrix has two clusters in each hierarchy
+    self.assertTrue(2 <= calls[-1][3] <= 4)
+
+  def test_cancel(self):
+
+    # Arrange, cancels after the first report
+    cancel = threading.Event()
+    calls = []
+
+    def callback(k, elapsed, rate, nonzeros):
+      calls.append(k)
+      cancel.set()
+
+    # Act / Assert
+    with self.assertRaises(CancelledError):
+      similarity_metrics(self.A, self.B, progress=callback, progress_every=10, cancel=cancel)
+
+    self.assertEqual([9], calls)
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.A, self.B, ties='align', cancel=cancel)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal
+from fastcluster import linkage
+from library.reductions import area, maximum, mean, minimum
+from library.similarity import similarity_metrics
+
+class TestReductions(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 17)
+    x = np.random.normal(0, 1, (90, 3))
+    self.A = linkage(x, 'average')
+    self.B = linkage(x, 'ward')
+    self.full = similarity_metrics(self.A, self.B)
+
+  def test_reductions(self):
+
+    # Arrange
+    weights = np.linspace(1, 2, 88)
+    reduce = [mean('ar'), mean('fm', weights), area('ar'), maximum('ar'), minimum('r')]
+
+    # Act
+    metrics = similarity_metrics(self.A, self.B, reduce=reduce)
+
+    # Assert
+    ar, fm, r = self.full.adjusted_rand(), self.full.fowlkes_mallows(), self.full.rand()
+    expected = {'mean_ar' : np.mean(ar),
+                'mean_fm' : np.average(fm, weights=weights),
+                'area_ar' : (np.sum(ar) - (ar[0] + ar[-1]) / 2) / 87,
+                'max_ar' : np.max(ar),
+                'max_ar_level' : np.argmax(ar),
+                'min_r' : np.min(r),
+                'min_r_level' : np.argmin(r)}
+
+    self.assertEqual(sorted(expected), sorted(metrics.reduced))
+    for name, value in expected.items():
+      assert_almost_equal(value, metrics.reduced[name])
+
+    self.assertFalse(hasattr(metrics, 'T'))
+
+  def test_unsupported(self):
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.A, self.B, reduce=[mean('ar')], null_model=True)
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.A, self.B, reduce=[mean('ar', np.ones(3))])
+
+if __name__ == '__main__':
+  unittest.main()
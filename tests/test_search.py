@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_equal
+from fastcluster import linkage
+from library.search import best_levels
+from library.similarity import similarity_metrics
+from library.sweep import merge_sweep
+
+class TestBestLevels(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 8455624)
+    x = np.random.normal(0, 2, (200, 2))
+    self.A = linkage(x, 'centroid')
+    self.B = linkage(x, 'ward')
+    self.metrics = similarity_metrics(self.A, self.B)
+
+  def test_merge_sweep(self):
+
+    T, P, Q = np.array([(T, P, Q) for _, T, P, Q in merge_sweep(self.A, self.B)]).T
+
+    assert_equal(self.metrics.T, T)
+    assert_equal(self.metrics.P, P)
+    assert_equal(self.metrics.Q, Q)
+
+  def test_argmax(self):
+
+    for index, values in [('ar', self.metrics.adjusted_rand()),
+                          ('fm', self.metrics.fowlkes_mallows()),
+                          ('r', self.metrics.rand())]:
+
+      levels, best = best_levels(self.A, self.B, index)
+
+      self.assertEqual(np.nanmax(values), best[0])
+      self.assertEqual(np.nanmax(values), values[levels[0]])
+
+  def test_top_k(self):
+
+    # Act
+    levels, best = best_levels(self.A, self.B, 'ar', top=5, check_every=7)
+
+    # Assert
+    ar = self.metrics.adjusted_rand()
+    expected = np.sort(ar)[::-1][:5]
+    assert_almost_equal(expected, best)
+    assert_almost_equal(ar[levels], best)
+    self.assertEqual(5, len(np.unique(levels)))
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from numpy.testing import assert_equal
+from library.service import similarity_service
+from library.similarity import similarity_metrics
+
+class CountingExecutor(ThreadPoolExecutor):
+
+  def __init__(self):
+    super().__init__(max_workers=2)
+    self.submitted = 0
+
+  def submit(self, *args, **kwargs):
+    self.submitted += 1
+    return super().submit(*args, **kwargs)
+
+class TestSimilarityService(unittest.TestCase):
+
+  def setUp(self):
+
+    self.A = np.array(
+      [[ 0. , 2., 0.11, 2. ],
+       [ 1. , 4., 0.23, 3. ],
+       [ 3. , 5., 0.24, 4. ]])
+
+    self.B = np.array(
+      [[ 0. , 2., 0.11, 2. ],
+       [ 3. , 4., 0.25, 3. ],
+       [ 1. , 5., 0.27, 4. ]])
+
+    self.executor = CountingExecutor()
+    self.service = similarity_service(cache_size=2, executor=self.executor)
+
+  def tearDown(self):
+    self.executor.shutdown()
+
+  def test_concurrent_requests_are_coalesced(self):
+
+    # Act
+    async def run():
+      return await asyncio.gather(*[self.service.metrics(self.A, self.B) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    # Assert
+    self.assertEqual(1, self.executor.submitted)
+    self.assertEqual(4, self.service.coalesced)
+    for metrics in results:
+      assert_equal(similarity_metrics(self.A, self.B).adjusted_rand(), metrics.adjusted_rand())
+
+  def test_swapped_request_served_from_cache(self):
+
+    # Act
+    async def run():
+      first = await self.service.metrics(self.A, self.B)
+      second = await self.service.metrics(self.B, self.A)
+      return first, second
+
+    first, second = asyncio.run(run())
+
+    # Assert
+    self.assertEqual(1, self.executor.submitted)
+    self.assertEqual(1, self.service.hits)
+    assert_equal(first.P, second.Q)
+    assert_equal(first.Q, second.P)
+    assert_equal(similarity_metrics(self.B, self.A).P, second.P)
+
+  def test_http_request(self):
+
+    # Act
+    async def run():
+      server = await self.service.start(port=0)
+      port = server.sockets[0].getsockname()[1]
+
+      body = json.dumps({'A': self.A.tolist(), 'B': self.B.tolist(), 'index': ['ar', 'fm']}).encode()
+      reader, writer = await asyncio.open_connection('127.0.0.1', port)
+      writer.write(b'POST /similarity HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+      await writer.drain()
+      response = await reader.read()
+      writer.close()
+
+      server.close()
+      await server.wait_closed()
+      return response
+
+    response = asyncio.run(run())
+
+    # Assert
+    header, _, body = response.partition(b'\r\n\r\n')
+    self.assertTrue(header.startswith(b'HTTP/1.1 200 OK'))
+    output = json.loads(body)
+    metrics = similarity_metrics(self.A, self.B)
+    assert_equal(metrics.adjusted_rand(), output['ar'])
+    assert_equal(metrics.fowlkes_mallows(), output['fm'])
+
+  def test_invalid_request(self):
+
+    status, payload = asyncio.run(self.service.respond('POST', '/similarity', b'{"A": [[0, 1, 0.1, 2]]}'))
+
+    self.assertEqual(400, status)
+    self.assertIn('error', payload)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -5,6 +5,8 @@ from library.similarity import similarity_metrics
 from scipy.cluster.hierarchy import fcluster
 from sklearn.metrics import adjusted_rand_score, fowlkes_mallows_score 
 from sklearn.metrics.cluster import contingency_matrix
+from sklearn.cluster import AgglomerativeClustering
+from fastcluster import linkage
  
 class TestSimilarityMetrics(unittest.TestCase):
 
@@ -134,6 +136,177 @@ class TestSimilarityMetrics(unittest.TestCase):
     assert_equal(metrics.rand(), metrics.get_index('r')['r'])
     assert_equal(metrics.rand(), metrics.get_index('rand')['rand'])
 
+  def test_validation(self):
+
+    invalid = self.small_A.copy()
+    invalid[1, 1] = 5 # cluster 5 is formed in the last row
+
+    for validate in ['numpy', 'scipy']:
+      with self.assertRaises(ValueError):
+        similarity_metrics(invalid, self.small_B, validate=validate)
+
+    assert_equal(similarity_metrics(self.small_A, self.small_B).T,
+                 similarity_metrics(self.small_A, self.small_B, validate='scipy').T)
+
+  def test_merge_arrays(self):
+
+    # Arrange
+    expected = similarity_metrics(self.large_A, self.large_B)
+    merges_A = self.large_A[:, :2].astype(np.int32)
+    merges_B = self.large_B[:, :2].astype(np.int64)
+
+    # Act
+    merges = similarity_metrics(merges_A, merges_B)
+    mixed = similarity_metrics(self.large_A, merges_B)
+    approximate = similarity_metrics(merges_A, merges_B, sample_size=100, seed=0)
+
+    # Assert
+    for metrics in [merges, mixed]:
+      assert_equal(expected.T, metrics.T)
+      assert_equal(expected.P, metrics.P)
+      assert_equal(expected.Q, metrics.Q)
+
+    assert_equal(expected.P, approximate.P)
+    assert_equal(expected.Q, approximate.Q)
+
+    invalid = merges_A.copy()
+    invalid[1, 1] = 12 # cluster 12 is formed in row 2
+    with self.assertRaises(ValueError):
+      similarity_metrics(invalid, merges_B)
+
+  def test_sklearn_children(self):
+
+    # Arrange
+    np.random.seed(seed = 0)
+    x = np.random.normal(0, 1, (50, 2))
+    children = AgglomerativeClustering(n_clusters=1, linkage='ward', compute_full_tree=True).fit(x).children_
+    B = linkage(x, 'average')
+
+    # Act
+    metrics = similarity_metrics(children, B)
+
+    # Assert
+    assert_almost_equal(similarity_metrics(linkage(x, 'ward'), B).adjusted_rand(), metrics.adjusted_rand())
+
+  def test_weights(self):
+
+    # Arrange
+    weights = [2, 1, 3, 1, 1, 1, 2, 1, 1, 4]
+    expanded_A = expand_linkage(self.large_A, weights)
+    expanded_B = expand_linkage(self.large_B, weights)
+
+    # Act
+    metrics = similarity_metrics(self.large_A, self.large_B, weights=weights)
+    expanded = similarity_metrics(expanded_A, expanded_B)
+
+    # Assert, the expanded hierarchies start by merging the copies of each object
+    D = sum(weights) - len(weights)
+    assert_equal(expanded.T[D:], metrics.T)
+    assert_equal(expanded.P[D:], metrics.P)
+    assert_equal(expanded.Q[D:], metrics.Q)
+    assert_equal(expanded.adjusted_rand()[D:], metrics.adjusted_rand())
+    assert_equal(expanded.rand()[D:], metrics.rand())
+
+  def test_ties_collapse(self):
+
+    # Arrange, discretised data has many merges at identical heights
+    np.random.seed(seed = 3)
+    x = np.round(np.random.normal(0, 2, (60, 2)))
+    A = linkage(x, 'single')
+    B = linkage(x, 'complete')
+
+    # Act
+    full = similarity_metrics(A, B)
+    collapsed = similarity_metrics(A, B, ties='collapse')
+
+    # Assert
+    last = [k for k in range(58) if A[k, 2] != A[k + 1, 2] and B[k, 2] != B[k + 1, 2]]
+    self.assertLess(len(last), 58)
+    assert_equal(last, collapsed.levels)
+    assert_equal(full.T[last], collapsed.T)
+    assert_equal(full.P[last], collapsed.P)
+    assert_equal(full.Q[last], collapsed.Q)
+
+  def test_ties_align(self):
+
+    # Arrange
+    np.random.seed(seed = 3)
+    x = np.round(np.random.normal(0, 2, (60, 2)))
+    A = linkage(x, 'single')
+    B = linkage(x, 'complete')
+
+    # Act
+    aligned = similarity_metrics(A, B, ties='align')
+
+    # Assert, compare with the flat clusterings cut at each height
+    heights = np.unique(np.concatenate([A[:, 2], B[:, 2]]))[:-1]
+    assert_equal(heights, aligned.heights)
+
+    for r, height in enumerate(heights):
+      C = contingency_matrix(fcluster(A, height, 'distance'), fcluster(B, height, 'distance'))
+      pairs = lambda counts: np.sum(counts * (counts - 1) // 2)
+      self.assertEqual(pairs(C), aligned.T[r])
+      self.assertEqual(pairs(C.sum(axis=1)), aligned.P[r])
+      self.assertEqual(pairs(C.sum(axis=0)), aligned.Q[r])
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(A[:, :2].astype(int), B[:, :2].astype(int), ties='align')
+
+  def test_snapshots(self):
+
+    # Act
+    metrics = similarity_metrics(self.large_A, self.large_B, snapshots=[0, 4, 7])
+
+    # Assert, compare with the contingency table of the labels of each object
+    self.assertEqual([0, 4, 7], sorted(metrics.snapshots))
+
+    for k, (M, row_labels, column_labels) in metrics.snapshots.items():
+
+      labels = []
+      for Z in [self.large_A, self.large_B]:
+        label = np.arange(10)
+        for j in range(k + 1):
+          label[np.isin(label, Z[j, :2])] = 10 + j
+        labels.append(label)
+
+      expected = np.zeros((len(row_labels), len(column_labels)))
+      np.add.at(expected, (np.searchsorted(row_labels, labels[0]), np.searchsorted(column_labels, labels[1])), 1)
+
+      assert_equal(np.unique(labels[0]), row_labels)
+      assert_equal(np.unique(labels[1]), column_labels)
+      assert_equal(expected, M.toarray())
+      self.assertEqual(metrics.T[k], np.sum(M.data * (M.data - 1) // 2))
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(self.large_A, self.large_B, snapshots=[8])
+
+  def test_top(self):
+
+    # Arrange
+    np.random.seed(seed = 23)
+    x = np.random.normal(0, 1, (500, 2))
+    A = linkage(x, 'ward')
+    B = linkage(x, 'average')
+    weights = np.arange(500) % 3 + 1
+
+    for w in [None, weights]:
+
+      # Act
+      full = similarity_metrics(A, B, weights=w)
+      top = similarity_metrics(A, B, weights=w, top=20)
+
+      # Assert
+      assert_equal(np.arange(479, 498), top.levels)
+      assert_equal(full.T[479:], top.T)
+      assert_equal(full.P[479:], top.P)
+      assert_equal(full.Q[479:], top.Q)
+      self.assertEqual(full.N, top.N)
+
+    assert_equal(full.T, similarity_metrics(A, B, weights=w, top=499).T)
+
+    with self.assertRaises(ValueError):
+      similarity_metrics(A, B, top=1)
+
   def test_similarity_multiple_indices(self):
 
     metrics = similarity_metrics(self.large_A, self.large_B)
@@ -145,5 +318,31 @@ class TestSimilarityMetrics(unittest.TestCase):
     assert_equal(metrics.rand(), output['r'])
 
 
+def expand_linkage(Z, weights):
+
+  # Replaces leaf i of the linkage Z by weights[i] copies which are merged first
+  n = len(Z) + 1
+  W = sum(weights)
+  rows, labels, sizes = [], [], {}
+  offset = 0
+
+  for w in weights:
+    label = offset
+    for copy in range(1, w):
+      rows.append([label, offset + copy, 0, copy + 1])
+      label = W + len(rows) - 1
+    labels.append(label)
+    sizes[label] = w
+    offset += w
+
+  D = len(rows)
+  for k, (i, j, height, _) in enumerate(Z):
+    i = labels[int(i)] if i < n else W + D + int(i) - n
+    j = labels[int(j)] if j < n else W + D + int(j) - n
+    sizes[W + D + k] = sizes[i] + sizes[j]
+    rows.append([i, j, height, sizes[W + D + k]])
+
+  return np.array(rows, 'double')
+
 if __name__ == '__main__':
   unittest.main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from numpy.testing import assert_equal
+from fastcluster import linkage
+from library.similarity import similarity_metrics
+from library.sinks import npy_sink
+
+class TestNpySink(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 5)
+    x = np.random.normal(0, 1, (100, 2))
+    self.A = linkage(x, 'average')
+    self.B = linkage(x, 'ward')
+    self.directory = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_sink_chunks(self):
+
+    # Arrange
+    sink = npy_sink(self.directory.name, 5, 45, ['T', 'fm'], chunk_size=2)
+
+    # Act
+    for TPQ in [(0, 1, 1), (1, 2, 1), (1, 3, 3), (3, 6, 3), (6, 10, 6)]:
+      sink.append(TPQ)
+    output = sink.close()
+
+    # Assert
+    self.assertEqual(['T', 'fm'], list(output))
+    self.assertIsInstance(output['T'], np.memmap)
+    assert_equal([0, 1, 1, 3, 6], output['T'])
+    assert_equal([0, 1 / np.sqrt(2), 1 / 3, 3 / np.sqrt(18), 6 / np.sqrt(60)], output['fm'])
+    self.assertEqual(5, sink.written)
+
+  def test_stream_TPQ(self):
+
+    # Act
+    expected = similarity_metrics(self.A, self.B)
+    streamed = similarity_metrics(self.A, self.B, out=self.directory.name, chunk_size=16)
+
+    # Assert
+    self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'T.npy')))
+    assert_equal(expected.T, streamed.T)
+    assert_equal(expected.P, streamed.P)
+    assert_equal(expected.Q, streamed.Q)
+    assert_equal(expected.adjusted_rand(), streamed.adjusted_rand())
+
+  def test_stream_indices(self):
+
+    # Act
+    expected = similarity_metrics(self.A, self.B)
+    streamed = similarity_metrics(self.A, self.B, out=self.directory.name, out_indices=['ar'], chunk_size=7)
+
+    # Assert
+    self.assertEqual(['ar'], list(streamed.output))
+    assert_equal(expected.adjusted_rand(), streamed.output['ar'])
+    self.assertFalse(hasattr(streamed, 'T'))
+
+if __name__ == '__main__':
+  unittest.main()
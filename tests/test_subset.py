@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_equal
+from fastcluster import linkage
+from scipy.cluster.hierarchy import cophenet
+from scipy.spatial.distance import squareform
+from library.linkages import is_valid_linkage
+from library.similarity import similarity_metrics
+from library.subset import induced_linkage
+
+class TestSubset(unittest.TestCase):
+
+  def setUp(self):
+
+    np.random.seed(seed = 7)
+    self.x = np.random.normal(0, 1, (80, 2))
+    self.A = linkage(self.x, 'average')
+    self.B = linkage(self.x, 'ward')
+    self.mask = np.random.rand(80) < 0.4
+
+  def test_induced_linkage(self):
+
+    # Act
+    Z = induced_linkage(self.A, self.mask)
+
+    # Assert, the cophenetic distances of the kept objects are unchanged
+    self.assertTrue(is_valid_linkage(Z, throw=True))
+    self.assertEqual(np.count_nonzero(self.mask) - 1, len(Z))
+
+    expected = squareform(cophenet(self.A))[np.ix_(self.mask, self.mask)]
+    assert_almost_equal(expected, squareform(cophenet(Z)))
+
+  def test_indices_and_merge_arrays(self):
+
+    indices = np.flatnonzero(self.mask)
+    assert_equal(induced_linkage(self.A, self.mask), induced_linkage(self.A, indices))
+
+    merges = induced_linkage(self.A[:, :2].astype(int), self.mask)
+    self.assertTrue(np.issubdtype(merges.dtype, np.integer))
+    assert_equal(induced_linkage(self.A, self.mask)[:, :2], merges)
+
+    with self.assertRaises(ValueError):
+      induced_linkage(self.A, np.arange(80) == 3)
+
+  def test_similarity_subset(self):
+
+    # Act
+    metrics = similarity_metrics(self.A, self.B, subset=self.mask)
+    expected = similarity_metrics(induced_linkage(self.A, self.mask), induced_linkage(self.B, self.mask))
+
+    # Assert
+    assert_equal(expected.T, metrics.T)
+    assert_equal(expected.P, metrics.P)
+    assert_equal(expected.Q, metrics.Q)
+    self.assertEqual(np.count_nonzero(self.mask), metrics.n)
+
+if __name__ == '__main__':
+  unittest.main()